@@ -19,14 +19,11 @@ def process(ast: asts.Program):
 
 def id(ast: asts.Id, ctx: symbols.Scope):
     name: str = ast.token.value
-    table = ctx.symtab
-    while name not in table and ctx.parent is not None:
-        ctx = ctx.parent
-        table = ctx.symtab
-    if name not in table:
+    symbol = ctx.lookup(name)
+    if symbol is None:
         error.error(f"Undefined identifier {name}", ast.span)
-    ast.symbol = ctx.symtab[name]
-        
+    ast.symbol = symbol
+
 def idexpr(ast: asts.IdExpr, ctx: symbols.Scope):
     id(ast.id, ctx)
 
@@ -76,7 +73,7 @@ def expr(ast: asts.Expr, ctx: symbols.Scope):
         case asts.UnaryOp():
             unaryop(ast, ctx)
         case _:
-            error.error(f"expr() not implemented for {type(ast)}", ctx.span)
+            error.error(f"expr() not implemented for {ast.__class__}", ctx.span)
 
 
 def inttype(ast: asts.IntType, ctx: symbols.Scope):
@@ -108,7 +105,7 @@ def typ(ast: asts.TypeAST, ctx: symbols.Scope):
         case asts.VoidType():
             voidtype(ast, ctx)
         case _:
-            error.error(f"typ() not implemented for {type(ast)}", ctx.span)
+            error.error(f"typ() not implemented for {ast.__class__}", ctx.span)
 
 
 def paramdecl(ast: asts.ParamDecl, ctx: symbols.Scope):
@@ -121,16 +118,16 @@ def vardecl(ast: asts.VarDecl, ctx: symbols.Scope):
 
 def compoundstmt(ast: asts.CompoundStmt, ctx: symbols.Scope):
     scope = symbols.LocalScope(ctx, ast.span)
-    symtab: dict = {}
-    scope.symtab = symtab
     ast.local_scope = scope
+    table = ctx.table
+    table.open(scope)
     for decl in ast.decls:
         newIdSymbol = symbols.IdSymbol(decl.id.token.value, scope)
-        name = decl.id.token.value
-        symtab[name] = newIdSymbol
+        table.declare(decl.id.token.value, newIdSymbol)
         vardecl(decl, scope)
     for s in ast.stmts:
         stmt(s, scope)
+    table.close()
 
 
 def assignstmt(ast: asts.AssignStmt, ctx: symbols.Scope):
@@ -183,35 +180,34 @@ def stmt(ast: asts.Stmt, ctx: symbols.Scope):
         case asts.PrintStmt():
             printstmt(ast, ctx)
         case _:
-            error.error(f"stmt() not implemented for {type(ast)}", ast.span)
+            error.error(f"stmt() not implemented for {ast.__class__}", ast.span)
 
 
 def funcdecl(ast: asts.FuncDecl, ctx: symbols.Scope):
     id(ast.id, ctx)
-    symbolTable = {}
     # create the function scope
     scope = symbols.FuncScope(ctx, ast.span)
-    scope.symtab = symbolTable
     ast.func_scope = scope
+    table = ctx.table
+    table.open(scope)
     for param in ast.params:
         newIdSymbol = symbols.IdSymbol(param.id.token.value, scope)
-        name = param.id.token.value
-        symbolTable[name] = newIdSymbol
+        table.declare(param.id.token.value, newIdSymbol)
         paramdecl(param, scope)
     typ(ast.ret_type_ast, scope)
     compoundstmt(ast.body, scope)
+    table.close()
 
 
 def program(ast: asts.Program):
     scope = symbols.GlobalScope(ast.span)
-    symTab = {}
-    scope.symtab = symTab
+    table = symbols.SymbolTable()
+    table.open(scope)
     for decl in ast.decls:
         newIdSymbol = symbols.IdSymbol(decl.id.token.value, scope)
         if decl.id.token.value == "main":
-            if decl.id.token.value in symTab:
+            if decl.id.token.value in scope.symtab:
                 error.error("main function already declared", decl.id.span)
-        symTab[decl.id.token.value] = newIdSymbol
+        table.declare(decl.id.token.value, newIdSymbol)
         funcdecl(decl, scope)
-    
-    
+    table.close()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from tau import asts, symbols, error
 from tau.vm.vm import (
@@ -44,166 +44,173 @@ def generate(ast: asts.Program) -> List[Insn]:
     return _Program(ast)
 
 
-def _Program(ast: asts.Program) -> List[Insn]:
-    res: List[Insn] = []
+# Every emitter appends to the single res list it is handed instead of
+# returning a list of its own for the caller to copy, so generating code
+# takes time linear in the number of instructions produced.
+
+
+# The buffer the emitters append to. It also names the labels of the function
+# being generated, <function>.<n> counting up from 0, so the output is the
+# same on every run and a function's code does not depend on the rest of the
+# program.
+class Code(list):
+    function: str = ""
+    count: int = 0
+
+    def label(self) -> str:
+        label: str = f"{self.function}.{self.count}"
+        self.count += 1
+        return label
+
+
+# bodies, if given, holds the already generated code of each decl
+def _Program(
+    ast: asts.Program, bodies: Optional[List[List[Insn]]] = None
+) -> List[Insn]:
+    res: Code = Code()
     res.append(PushLabel("main"))
     res.append(Call())
     res.append(Halt())
-    for decl in ast.decls:
+    for i, decl in enumerate(ast.decls):
         res.append(Label(decl.id.token.value))
-        f: List[Insn] = _FuncDecl(decl)
-        res.extend(f)
+        if bodies is None:
+            _FuncDecl(decl, res)
+        else:
+            res.extend(bodies[i])
     res.append(Halt())
     return res
 
 
-def _Stmt(ast: asts.Stmt) -> List[Insn]:
+def _Stmt(ast: asts.Stmt, res: Code):
     if isinstance(ast, asts.AssignStmt):
-        return _AssignStmt(ast)
+        _AssignStmt(ast, res)
     elif isinstance(ast, asts.IfStmt):
-        return _IfStmt(ast)
+        _IfStmt(ast, res)
     elif isinstance(ast, asts.WhileStmt):
-        return _WhileStmt(ast)
+        _WhileStmt(ast, res)
     elif isinstance(ast, asts.CallStmt):
-        return _CallStmt(ast)
+        _CallStmt(ast, res)
     elif isinstance(ast, asts.CompoundStmt):
-        return _CompoundStmt(ast)
+        _CompoundStmt(ast, res)
     elif isinstance(ast, asts.PrintStmt):
-        return _PrintStmt(ast)
+        _PrintStmt(ast, res)
     elif isinstance(ast, asts.ReturnStmt):
-        return _ReturnStmt(ast)
+        _ReturnStmt(ast, res)
     else:
-        assert False, f"_Stmt() not implemented for {type(ast)}"
+        assert False, f"_Stmt() not implemented for {ast.__class__}"
 
 
-def rval_CallExpr(ast: asts.CallExpr) -> List[Insn]:
-    res: List[Insn] = []
+def rval_CallExpr(ast: asts.CallExpr, res: Code):
     # do pre-call stuff
     for i, arg in enumerate(ast.args):
         res.append(PushSP(-i - 2))
-        res.extend(rval(arg))
+        rval(arg, res)
         res.append(Store())
     # do something with ast.fn
-    res.extend(lval(ast.fn))
+    lval(ast.fn, res)
     res.append(Call())
     # do post-call stuff
     res.append(PushSP(-1))
     res.append(Load())
-    return res
 
 
-def _AssignStmt(ast: asts.AssignStmt) -> List[Insn]:
-    res: List[Insn] = []
-    res.extend(lval(ast.lhs))
-    res.extend(rval(ast.rhs))
+def _AssignStmt(ast: asts.AssignStmt, res: Code):
+    lval(ast.lhs, res)
+    rval(ast.rhs, res)
     res.append(Store())
-    return res
 
 
-def _PrintStmt(ast: asts.PrintStmt) -> List[Insn]:
-    res: List[Insn] = []
-    res.extend(rval(ast.expr))
+def _PrintStmt(ast: asts.PrintStmt, res: Code):
+    rval(ast.expr, res)
     res.append(Print())
-    return res
 
 
-def _IfStmt(ast: asts.IfStmt) -> List[Insn]:
-    res: List[Insn] = []
-    elselabel: str = "else" + str(id(ast))
-    exitlabel: str = "exit" + str(id(ast))
+def _IfStmt(ast: asts.IfStmt, res: Code):
+    elselabel: str = res.label()
+    exitlabel: str = res.label()
     elseLabel: Label = Label(elselabel)
     exitLabel: Label = Label(exitlabel)
     ############################################################
-    res.extend(control(ast.expr, elselabel, False))
-    res.extend(_Stmt(ast.thenStmt))
+    control(ast.expr, elselabel, False, res)
+    _Stmt(ast.thenStmt, res)
     res.append(Jump(exitlabel))
     # add elseLabel here
     res.append(elseLabel)
     if ast.elseStmt:
-        res.extend(_Stmt(ast.elseStmt))
+        _Stmt(ast.elseStmt, res)
     res.append(exitLabel)
-    return res
 
 
-def _WhileStmt(ast: asts.WhileStmt) -> List[Insn]:
-    res: List[Insn] = []
-    toplabel: str = "top" + str(id(ast))
-    exitlabel: str = "exit" + str(id(ast))
+def _WhileStmt(ast: asts.WhileStmt, res: Code):
+    toplabel: str = res.label()
+    exitlabel: str = res.label()
     topLabel: Label = Label(toplabel)
     exitLabel: Label = Label(exitlabel)
     ############################################################
     res.append(topLabel)
-    res.extend(control(ast.expr, exitlabel, False))
-    res.extend(_Stmt(ast.stmt))
+    control(ast.expr, exitlabel, False, res)
+    _Stmt(ast.stmt, res)
     res.append(Jump(toplabel))
     res.append(exitLabel)
-    return res
 
 
 # Generate the code such that control is transferred to the label
 # if the expression evaluated to the "sense" value.
-def control(e: asts.Expr, label: str, sense: bool) -> List[Insn]:
+def control(e: asts.Expr, label: str, sense: bool, res: Code):
     match e:
         case asts.BinaryOp():
-            return control_BinaryOp(e, label, sense)
+            control_BinaryOp(e, label, sense, res)
         case asts.UnaryOp():
-            return control_UnaryOp(e, label, sense)
+            control_UnaryOp(e, label, sense, res)
         case asts.BoolLiteral():
-            return control_BoolLiteral(e, label, sense)
+            control_BoolLiteral(e, label, sense, res)
         case asts.IdExpr():
-            return control_IdExpr(e, label, sense)
+            control_IdExpr(e, label, sense, res)
         case asts.CallExpr():
-            return control_CallExpr(e, label, sense)
+            control_CallExpr(e, label, sense, res)
         case _:
-            error.error(f"control() not implemented for {type(e)}", e.span)   
+            error.error(f"control() not implemented for {e.__class__}", e.span)   
 
-def control_CallExpr(e: asts.CallExpr, label: str, sense: bool) -> List[Insn]:
-    res: List[Insn] = []
-    res.extend(rval(e))
+def control_CallExpr(e: asts.CallExpr, label: str, sense: bool, res: Code):
+    rval(e, res)
     if sense:
         res.append(JumpIfNotZero(label))
     else:
         res.append(JumpIfZero(label))
-    return res
 
 
-def control_IdExpr(e: asts.IdExpr, label: str, sense: bool) -> List[Insn]:
-    res: List[Insn] = []
-    res.extend(rval(e))
+def control_IdExpr(e: asts.IdExpr, label: str, sense: bool, res: Code):
+    rval(e, res)
     if sense:
         res.append(JumpIfNotZero(label))
     else:
         res.append(JumpIfZero(label))
-    return res
 
 
-def control_BoolLiteral(e: asts.BoolLiteral, label: str, sense: bool) -> List[Insn]:
-    res: List[Insn] = []
+def control_BoolLiteral(e: asts.BoolLiteral, label: str, sense: bool, res: Code):
     if e.value == sense:
         res.append(Jump(label))
-    return res
 
 
-def control_BinaryOp(e: asts.BinaryOp, label: str, sense: bool) -> List[Insn]:
-    res: List[Insn] = []
-    exitlabel: str = "exit" + str(id(e))
+def control_BinaryOp(e: asts.BinaryOp, label: str, sense: bool, res: Code):
+    exitlabel: str = res.label()
     exitLabel: Label = Label(exitlabel)
     match e.op.kind:
         case "and":
             if sense:
-                res.extend(control(e.left, exitlabel, False))
-                res.extend(control(e.right, label, True))
+                control(e.left, exitlabel, False, res)
+                control(e.right, label, True, res)
                 res.append(exitLabel)
             else:
-                res.extend(control(e.left, label, False))
-                res.extend(control(e.right, label, False))
+                control(e.left, label, False, res)
+                control(e.right, label, False, res)
         case "or":
             if sense:
-                res.extend(control(e.left, label, True))
-                res.extend(control(e.right, label, True))
+                control(e.left, label, True, res)
+                control(e.right, label, True, res)
             else:
-                res.extend(control(e.left, exitlabel, True))
-                res.extend(control(e.right, label, False))
+                control(e.left, exitlabel, True, res)
+                control(e.right, label, False, res)
                 res.append(exitLabel)
         case "<" | "<=" | ">" | ">=" | "==" | "!=":
             insns: dict[str, Insn] = {
@@ -214,8 +221,8 @@ def control_BinaryOp(e: asts.BinaryOp, label: str, sense: bool) -> List[Insn]:
                 "==": Equal(),
                 "!=": NotEqual(),
             }
-            res.extend(rval(e.left))
-            res.extend(rval(e.right))
+            rval(e.left, res)
+            rval(e.right, res)
             res.append(insns[e.op.kind])
             if sense:
                 res.append(JumpIfNotZero(label))
@@ -223,84 +230,71 @@ def control_BinaryOp(e: asts.BinaryOp, label: str, sense: bool) -> List[Insn]:
                 res.append(JumpIfZero(label))
         case _:
             error.error(f"control_BinaryOp() not implemented for {e.op.kind}", e.op.span)
-    return res
 
 
-def control_UnaryOp(e: asts.UnaryOp, label: str, sense: bool) -> List[Insn]:
+def control_UnaryOp(e: asts.UnaryOp, label: str, sense: bool, res: Code):
     match e.op.kind:
         case "not":
-            return control(e.expr, label, not sense)
+            control(e.expr, label, not sense, res)
         case _:
             assert False, f"control_UnaryOp() not implemented for {e.op.kind}"
 
 
-def _CallStmt(ast: asts.CallStmt) -> List[Insn]:
-    res: List[Insn] = []
-    res.extend(rval(ast.call))
-    return res
+def _CallStmt(ast: asts.CallStmt, res: Code):
+    rval(ast.call, res)
 
 
-def _CompoundStmt(ast: asts.CompoundStmt) -> List[Insn]:
-    res: List[Insn] = []
+def _CompoundStmt(ast: asts.CompoundStmt, res: Code):
     for stmt in ast.stmts:
-        v = _Stmt(stmt)
-        res.extend(v)
-    return res
+        _Stmt(stmt, res)
 
 
-def _FuncDecl(ast: asts.FuncDecl) -> List[Insn]:
-    res: List[Insn] = []
+def _FuncDecl(ast: asts.FuncDecl, res: Code):
+    res.function, res.count = ast.id.token.value, 0
     # if ast.id.token.value == "f":
     #     raise Exception(ast.size)
     # do something for prologue
-    prolog: List[Insn] = []
     offset: int = ast.size
     # # push callees return address at offset 0 from callee fp
     ############################################################
-    prolog.append(PushSP(0, "address offset 0 from callers Sp"))
-    prolog.append(Swap())
-    prolog.append(Store())
+    res.append(PushSP(0, "address offset 0 from callers Sp"))
+    res.append(Swap())
+    res.append(Store())
     # push callees Fp at offset 1 from fp
-    prolog.append(PushSP(1, "address offset 1 from callers Sp"))
-    prolog.append(PushFP(0, "FP value to save"))
-    prolog.append(Store())
+    res.append(PushSP(1, "address offset 1 from callers Sp"))
+    res.append(PushFP(0, "FP value to save"))
+    res.append(Store())
     # push callers Sp at offset 2 from fp
-    prolog.append(PushSP(2, "address offset 2 from callers Sp"))
-    prolog.append(PushSP(0, "SP value to save"))
-    prolog.append(Store())
+    res.append(PushSP(2, "address offset 2 from callers Sp"))
+    res.append(PushSP(0, "SP value to save"))
+    res.append(Store())
     # set callee fp to caller stack pointer
-    prolog.append(PushSP(0, "push current sp to stack"))
-    prolog.append(PopFP("set fp to sp, pop sp from stack"))
+    res.append(PushSP(0, "push current sp to stack"))
+    res.append(PopFP("set fp to sp, pop sp from stack"))
     # set callee sp to caller sp + offset
-    prolog.append(PushSP(offset, "push new sp + offfset to stack"))
-    prolog.append(PopSP("set sp to new sp + offset"))
-    res.extend(prolog)
+    res.append(PushSP(offset, "push new sp + offfset to stack"))
+    res.append(PopSP("set sp to new sp + offset"))
     # compund stmt
-    c: List[Insn] = _CompoundStmt(ast.body)
-    res.extend(c)
+    _CompoundStmt(ast.body, res)
     # do something for epilogue
-    epilogue: List[Insn] = []
     # push the return address 
-    epilogue.append(PushFP(0))
-    epilogue.append(Load())
+    res.append(PushFP(0))
+    res.append(Load())
     # push the callers fp
-    epilogue.append(PushFP(2, "push callers fp to stack"))
-    epilogue.append(Load())
-    epilogue.append(PopSP())
+    res.append(PushFP(2, "push callers fp to stack"))
+    res.append(Load())
+    res.append(PopSP())
     # push the callers sp
-    epilogue.append(PushFP(1, "push callers sp to stack"))
-    epilogue.append(Load())
-    epilogue.append(PopFP())
+    res.append(PushFP(1, "push callers sp to stack"))
+    res.append(Load())
+    res.append(PopFP())
     # jump to return address
-    epilogue.append(JumpIndirect())
-    res.extend(epilogue)
-    return res
+    res.append(JumpIndirect())
 
-def _ReturnStmt(ast: asts.ReturnStmt) -> List[Insn]:
-    res: List[Insn] = []
+def _ReturnStmt(ast: asts.ReturnStmt, res: Code):
     if ast.expr:
         res.append(PushFP(-1))
-        res.extend(rval(ast.expr))
+        rval(ast.expr, res)
         res.append(Store())
     res.append(PushFP(0))
     res.append(Load())
@@ -312,20 +306,18 @@ def _ReturnStmt(ast: asts.ReturnStmt) -> List[Insn]:
     res.append(Load())
     res.append(PopFP())
     res.append(JumpIndirect())
-    return res
 
 
-def lval(e: asts.Expr) -> List[Insn]:
+def lval(e: asts.Expr, res: Code):
     match e:
         case asts.IdExpr():
-            return lval_IdExpr(e)
+            lval_IdExpr(e, res)
         case _:
-            assert False, f"lval() not implemented for {type(e)}"
+            assert False, f"lval() not implemented for {e.__class__}"
 
 
-def lval_IdExpr(e: asts.IdExpr) -> List[Insn]:
+def lval_IdExpr(e: asts.IdExpr, res: Code):
     assert isinstance(e.id.symbol, symbols.IdSymbol)
-    res: List[Insn] = []
     offset: int = e.id.symbol.offset
     match type(e.id.symbol.scope):
         case symbols.GlobalScope:
@@ -336,54 +328,46 @@ def lval_IdExpr(e: asts.IdExpr) -> List[Insn]:
             res.append(PushFP(offset))
         case _:
             assert False, f"lval_id() not implemented for {type(e.id.symbol.scope)}"
-    return res
 
 
-def rval(e: asts.Expr) -> List[Insn]:
+def rval(e: asts.Expr, res: Code):
     match e:
         case asts.BinaryOp():
-            return rval_BinaryOp(e)
+            rval_BinaryOp(e, res)
         case asts.UnaryOp():
-            return rval_UnaryOp(e)
+            rval_UnaryOp(e, res)
         case asts.CallExpr():
-            return rval_CallExpr(e)
+            rval_CallExpr(e, res)
         case asts.IdExpr():
-            return rval_IdExpr(e)
+            rval_IdExpr(e, res)
         case asts.IntLiteral():
-            return rval_IntLiteral(e)
+            rval_IntLiteral(e, res)
         case asts.BoolLiteral():
-            return rval_BoolLiteral(e)
+            rval_BoolLiteral(e, res)
         case _:
-            assert False, f"rval() not implemented for {type(e)}"
+            assert False, f"rval() not implemented for {e.__class__}"
 
 
-def rval_BoolLiteral(e: asts.BoolLiteral) -> List[Insn]:
-    res: List[Insn] = []
+def rval_BoolLiteral(e: asts.BoolLiteral, res: Code):
     if e.token.value == "true":
         res.append(PushImmediate(1))
     else:
         res.append(PushImmediate(0))
-    return res
 
 
-def rval_IntLiteral(e: asts.IntLiteral) -> List[Insn]:
-    res: List[Insn] = []
+def rval_IntLiteral(e: asts.IntLiteral, res: Code):
     res.append(PushImmediate(int(e.token.value)))
-    return res
 
 
-def rval_IdExpr(e: asts.IdExpr) -> List[Insn]:
-    res: List[Insn] = []
-    res.extend(lval(e))
+def rval_IdExpr(e: asts.IdExpr, res: Code):
+    lval(e, res)
     res.append(Load())
-    return res
 
 
-def rval_BinaryOp(e: asts.BinaryOp) -> List[Insn]:
-    res: List[Insn] = []
+def rval_BinaryOp(e: asts.BinaryOp, res: Code):
     if e.op.kind in ["+", "-", "*", "/", "<", "<=", ">", ">=", "==", "!="]:
-        res.extend(rval(e.left))
-        res.extend(rval(e.right))
+        rval(e.left, res)
+        rval(e.right, res)
     match e.op.kind:
         case "+":
             res.append(Add())
@@ -406,9 +390,9 @@ def rval_BinaryOp(e: asts.BinaryOp) -> List[Insn]:
         case "!=":
             res.append(NotEqual())
         case "and" | "or" | "not":
-            trueLabel: str = f"true_{id(e)}"
-            exitLabel: str = f"exit_{id(e)}"
-            res.extend(control(e, trueLabel, True))
+            trueLabel: str = res.label()
+            exitLabel: str = res.label()
+            control(e, trueLabel, True, res)
             res.append(PushImmediate(0))
             res.append(Jump(exitLabel))
             res.append(Label(trueLabel))
@@ -416,20 +400,16 @@ def rval_BinaryOp(e: asts.BinaryOp) -> List[Insn]:
             res.append(Label(exitLabel))
         case _:
             assert False, f"rval_BinaryOp() not implemented for {e.op}"
-    return res
 
 
-def rval_UnaryOp(e: asts.UnaryOp) -> List[Insn]:
-    res: List[Insn] = []
+def rval_UnaryOp(e: asts.UnaryOp, res: Code):
     match e.op.kind:
         case "-":
-            res.extend(rval(e.expr))
+            rval(e.expr, res)
             res.append(PushImmediate(-1))
             res.append(Mul())
         case "not":
-            res.append(PushImmediate(1))
-            res.extend(rval(e.expr))
-            res.append(Sub())
+            rval(e.expr, res)
+            res.append(Not())
         case _:
             assert False, f"rval_UnaryOp() not implemented for {e.op}"
-    return res
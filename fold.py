@@ -0,0 +1,174 @@
+import operator
+from typing import Optional, Union
+
+from tau import asts, symbols
+from tau.tokens import Token
+
+# Constant folding and algebraic simplification on the typed tree, run after
+# typecheck and before codegen. Operators on literals are replaced by their
+# value, computed the way the VM would: / is floor division, and a division
+# by a literal 0 is left for the VM to fail on. x + 0, x - 0, x * 1, x / 1,
+# - - x and not not x become x, and an and/or whose left side is a literal
+# keeps only what its short circuit would run. if and while statements whose
+# condition folds to a literal are replaced by the branch that runs. Nothing
+# that might call a function is dropped, so side effects are kept.
+#
+# Folding runs before offsets, so it changes frame layout: the variables of a
+# pruned block get no slots, and the block that replaces an if true is laid
+# out as a plain compound statement, whose variables count toward the frame
+# size where an if's do not. semantics assigns offsets as it types, so after
+# the fused pass offsets.program is run again on the folded tree.
+
+ARITHMETIC = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.floordiv,
+}
+COMPARISONS = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def intliteral(value: int, span: asts.Span) -> asts.IntLiteral:
+    literal = asts.IntLiteral(Token("INT", str(value), span), span)
+    literal.semantic_type = symbols.INT
+    return literal
+
+
+def boolliteral(value: bool, span: asts.Span) -> asts.BoolLiteral:
+    text: str = "true" if value else "false"
+    literal = asts.BoolLiteral(Token(text, text, span), value, span)
+    literal.semantic_type = symbols.BOOL
+    return literal
+
+
+# the value of a literal, or None if the expression is not one
+def constant(ast: asts.Expr) -> Union[int, bool, None]:
+    match ast:
+        case asts.IntLiteral():
+            return int(ast.token.value)
+        case asts.BoolLiteral():
+            return ast.value
+    return None
+
+
+def callexpr(ast: asts.CallExpr) -> asts.Expr:
+    ast.args = [expr(arg) for arg in ast.args]
+    return ast
+
+
+def arraycell(ast: asts.ArrayCell) -> asts.Expr:
+    ast.idx = expr(ast.idx)
+    return ast
+
+
+def binaryop(ast: asts.BinaryOp) -> asts.Expr:
+    ast.left = expr(ast.left)
+    ast.right = expr(ast.right)
+    op: str = ast.op.kind
+    left = constant(ast.left)
+    right = constant(ast.right)
+    if op in {"and", "or"}:
+        if left is None:
+            return ast
+        # false and x, true or x: the right side never runs
+        if left == (op == "or"):
+            return boolliteral(left, ast.span)
+        return ast.right
+    if left is not None and right is not None:
+        if op in COMPARISONS:
+            return boolliteral(COMPARISONS[op](left, right), ast.span)
+        if op == "/" and right == 0:
+            return ast
+        return intliteral(ARITHMETIC[op](left, right), ast.span)
+    match op, left, right:
+        case "+", 0, _:
+            return ast.right
+        case "+" | "-", _, 0:
+            return ast.left
+        case "*", 1, _:
+            return ast.right
+        case "*" | "/", _, 1:
+            return ast.left
+    return ast
+
+
+def unaryop(ast: asts.UnaryOp) -> asts.Expr:
+    ast.expr = expr(ast.expr)
+    value = constant(ast.expr)
+    match ast.op.kind:
+        case "-" if value is not None:
+            return intliteral(-value, ast.span)
+        case "not" if value is not None:
+            return boolliteral(not value, ast.span)
+    inner = ast.expr
+    if isinstance(inner, asts.UnaryOp) and inner.op.kind == ast.op.kind:
+        return inner.expr
+    return ast
+
+
+# returns the expression to use in place of ast
+def expr(ast: asts.Expr) -> asts.Expr:
+    match ast:
+        case asts.BinaryOp():
+            return binaryop(ast)
+        case asts.UnaryOp():
+            return unaryop(ast)
+        case asts.CallExpr():
+            return callexpr(ast)
+        case asts.ArrayCell():
+            return arraycell(ast)
+    return ast
+
+
+def compoundstmt(ast: asts.CompoundStmt):
+    stmts: list[asts.Stmt] = []
+    for s in ast.stmts:
+        folded: Optional[asts.Stmt] = stmt(s)
+        if folded is not None:
+            stmts.append(folded)
+    ast.stmts = stmts
+
+
+# returns the statement to use in place of ast, or None to drop it
+def stmt(ast: asts.Stmt) -> Optional[asts.Stmt]:
+    match ast:
+        case asts.AssignStmt():
+            ast.lhs = expr(ast.lhs)
+            ast.rhs = expr(ast.rhs)
+        case asts.IfStmt():
+            ast.expr = expr(ast.expr)
+            compoundstmt(ast.thenStmt)
+            if ast.elseStmt is not None:
+                compoundstmt(ast.elseStmt)
+            value = constant(ast.expr)
+            if value is True:
+                return ast.thenStmt
+            if value is False:
+                return ast.elseStmt
+        case asts.WhileStmt():
+            ast.expr = expr(ast.expr)
+            compoundstmt(ast.stmt)
+            if constant(ast.expr) is False:
+                return None
+        case asts.PrintStmt():
+            ast.expr = expr(ast.expr)
+        case asts.CallStmt():
+            callexpr(ast.call)
+        case asts.CompoundStmt():
+            compoundstmt(ast)
+        case asts.ReturnStmt():
+            if ast.expr is not None:
+                ast.expr = expr(ast.expr)
+    return ast
+
+
+def program(ast: asts.Program):
+    for decl in ast.decls:
+        compoundstmt(decl.body)
@@ -0,0 +1,169 @@
+import gc
+import hashlib
+from typing import List, Optional
+
+from tau import asts, symbols, error
+from tau.arena import fields
+from tau.vm.vm_insns import Insn
+import scanner
+import parse
+import semantics
+import codegen
+
+# Recompiles a program function by function, reusing the work done for every
+# function whose text has not changed since the previous compile.
+#
+# The source is lexed into an ArrayScanner token buffer and split into one
+# token range per FuncDecl. Each range is keyed by a hash of the source it
+# covers, and only new or changed ranges are parsed. A cached function keeps
+# its resolved, typed and offset-annotated subtree and its codegen._FuncDecl
+# instructions. It is reused only while every function it refers to is still
+# visible at its position with the same FuncType, so changing a signature
+# recompiles the callers too. Reused subtrees keep the spans of the compile
+# that built them. Anything the splitter does not recognise is handed to the
+# whole-program pipeline, which reports the error.
+#
+# Given a tau.cache.Cache, compiled functions are also pickled into it, so a
+# later run of tau.main --incremental reuses every function it finds there.
+
+
+class CachedFunction:
+    def __init__(self, decl: asts.FuncDecl, insns: List[Insn]):
+        self.decl: asts.FuncDecl = decl
+        self.insns: List[Insn] = insns
+        self.type: symbols.SemanticType = decl.id.semantic_type
+        # the FuncType each global name used in the function resolved to
+        self.deps: dict[str, symbols.SemanticType] = {}
+        stack: list = [decl.params, decl.ret_type_ast, decl.body]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif node is not None:
+                symbol = getattr(node, "symbol", None)
+                if (
+                    isinstance(symbol, symbols.IdSymbol)
+                    and isinstance(symbol.scope, symbols.GlobalScope)
+                    and symbol is not decl.id.symbol
+                ):
+                    self.deps[symbol.name] = symbol.get_type()
+                stack.extend(fields(node))
+
+    def valid(self, table: symbols.SymbolTable) -> bool:
+        for name, t in self.deps.items():
+            symbol: Optional[symbols.Symbol] = table.lookup(name)
+            if symbol is None or symbol.get_type() is not t:
+                return False
+        return True
+
+
+# [start, end) token ranges of the top-level function declarations, or None
+# if the tokens are not a sequence of well-nested funcs
+def split(buffer: scanner.TokenBuffer) -> Optional[list[tuple[int, int]]]:
+    kinds: list[str] = [buffer.kind(i) for i in range(len(buffer))]
+    ranges: list[tuple[int, int]] = []
+    i: int = 0
+    while kinds[i] != "EOF":
+        if kinds[i] != "func":
+            return None
+        depth: int = 0
+        j: int = i + 1
+        while kinds[j] != "EOF":
+            if kinds[j] == "{":
+                depth += 1
+            elif kinds[j] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif kinds[j] == "func":
+                return None
+            j += 1
+        if kinds[j] == "EOF":
+            return None
+        ranges.append((i, j + 1))
+        i = j + 1
+    return ranges if ranges else None
+
+
+class Compiler:
+    def __init__(self, cache=None):
+        self.functions: dict[str, CachedFunction] = {}
+        self.cache = cache
+        # what the last compile() did with each function
+        self.reused: int = 0
+        self.rebuilt: int = 0
+
+    # every function loaded or built here is a few thousand long-lived
+    # objects, and letting the collector run meanwhile rescans the growing
+    # heap over and over
+    def compile(self, input: scanner.Source) -> tuple[asts.Program, List[Insn]]:
+        collecting: bool = gc.isenabled()
+        gc.disable()
+        try:
+            return self.compileFunctions(input)
+        finally:
+            if collecting:
+                gc.enable()
+
+    def compileFunctions(self, input: scanner.Source) -> tuple[asts.Program, List[Insn]]:
+        lexer: scanner.ArrayScanner = scanner.ArrayScanner(input)
+        buffer: scanner.TokenBuffer = lexer.tokenBuffer
+        ranges: Optional[list[tuple[int, int]]] = split(buffer)
+        if ranges is None:
+            return self.compileAll(input)
+        self.reused = self.rebuilt = 0
+        scope = symbols.GlobalScope(
+            asts.Span(buffer.span(ranges[0][0]).start, buffer.span(ranges[-1][1] - 1).end)
+        )
+        table = symbols.SymbolTable()
+        table.open(scope)
+        functions: dict[str, CachedFunction] = {}
+        decls: list[asts.FuncDecl] = []
+        bodies: List[List[Insn]] = []
+        for start, end in ranges:
+            text = buffer.source[buffer.starts[start] : buffer.ends[end - 1]]
+            key: str = hashlib.sha256(
+                text.encode() if isinstance(text, str) else bytes(text)
+            ).hexdigest()
+            name: str = buffer.value(start + 1)
+            if name == "main" and name in scope.symtab:
+                error.error("main function already declared", buffer.span(start + 1))
+            cached: Optional[CachedFunction] = self.functions.get(key)
+            diskKey: Optional[str] = None
+            if self.cache is not None:
+                diskKey = self.cache.key(text, "function")
+                if cached is None:
+                    cached = self.cache.load_pickle(diskKey)
+            if key not in functions and cached is not None and cached.valid(table):
+                symbol = symbols.IdSymbol(name, scope)
+                symbol.set_type(cached.type)
+                table.declare(name, symbol)
+                cached.decl.id.symbol = symbol
+                self.reused += 1
+            else:
+                lexer.cursor, lexer.currentToken = start, None
+                decl: asts.FuncDecl = parse.Parser(lexer)._funcDec()
+                if lexer.cursor != end:
+                    return self.compileAll(input)
+                table.declare(name, symbols.IdSymbol(name, scope))
+                semantics.funcdecl(decl, scope)
+                body: codegen.Code = codegen.Code()
+                codegen._FuncDecl(decl, body)
+                cached = CachedFunction(decl, body)
+                self.rebuilt += 1
+                if diskKey is not None:
+                    self.cache.store_pickle(diskKey, cached)
+            functions.setdefault(key, cached)
+            decls.append(cached.decl)
+            bodies.append(cached.insns)
+        table.close()
+        # only what this compile used is kept
+        self.functions = functions
+        tree: asts.Program = asts.Program(decls, scope.span)
+        return tree, codegen._Program(tree, bodies)
+
+    def compileAll(self, input: scanner.Source) -> tuple[asts.Program, List[Insn]]:
+        tree: asts.Program = parse.Parser(scanner.ArrayScanner(input)).parse()
+        semantics.program(tree)
+        self.reused, self.rebuilt = 0, len(tree.decls)
+        return tree, codegen.generate(tree)
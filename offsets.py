@@ -59,7 +59,7 @@ def expr(ast: asts.Expr, offset: int):
         case asts.UnaryOp():
             unaryop(ast, offset)
         case _:
-            error.error(f"expr() not implemented for {type(ast)}", ast.span)
+            error.error(f"expr() not implemented for {ast.__class__}", ast.span)
 
 
 def inttype(ast: asts.IntType, offset: int):
@@ -91,7 +91,7 @@ def typ(ast: asts.TypeAST, offset: int):
         case asts.VoidType():
             voidtype(ast, offset)
         case _:
-            error.error(f"typ() not implemented for {type(ast)}", ast.span)
+            error.error(f"typ() not implemented for {ast.__class__}", ast.span)
 
 
 def paramdecl(ast: asts.ParamDecl, offset: int):
@@ -165,7 +165,7 @@ def stmt(ast: asts.Stmt, offset: int) -> int:
         case asts.PrintStmt():
             printstmt(ast, offset)
         case _:
-            error.error(f"stmt() not implemented for {type(ast)}", ast.span)
+            error.error(f"stmt() not implemented for {ast.__class__}", ast.span)
     return paramSize
 
 def funcdecl(ast: asts.FuncDecl):
@@ -1,11 +1,63 @@
+import sys
+import types
 import typing
 from tau import asts as ast, tokens
 from tau import error
 
+# FIRST sets of the productions, built once instead of on every call
+FIRST_EXPR: frozenset[str] = frozenset({"(", "-", "false", "not", "true", "ID", "INT"})
+FIRST_UNARY: frozenset[str] = frozenset({"-", "not"})
+FIRST_POSTFIX: frozenset[str] = frozenset({"(", "["})
+# bool -> "true" | "false"
+FIRST_BOOL: frozenset[str] = frozenset({"false", "true"})
+# operators -> "<" | "<=" | "==" | "!=" | ">" | ">="
+COMPARE_OPS: frozenset[str] = frozenset({"!=", "<", "<=", "==", ">", ">="})
+# subPlus -> "-" | "+"
+ADD_OPS: frozenset[str] = frozenset({"+", "-"})
+# DivTimes -> "/" | "*"
+MUL_OPS: frozenset[str] = frozenset({"*", "/"})
+# binary operator -> binding power, loosest first
+BINDING_POWER: dict[str, int] = {"or": 1, "and": 2}
+BINDING_POWER.update({op: 3 for op in COMPARE_OPS})
+BINDING_POWER.update({op: 4 for op in ADD_OPS})
+BINDING_POWER.update({op: 5 for op in MUL_OPS})
+# FIRST(stmt) and FOLLOW(stmt) plus FOLLOW(funcDec): RecoveringParser skips
+# to one of these after a syntax error inside a block
+STMT_SYNC: frozenset[str] = frozenset(
+    {"while", "{", "if", "print", "call", "ID", "return", "}", "func", "EOF"}
+)
+# FOLLOW(funcDec): where RecoveringParser resumes after a bad declaration
+FUNC_SYNC: frozenset[str] = frozenset({"func", "EOF"})
+# Python frames the passes after parsing use per level of nesting, and the
+# recursion limit IterativeParser asks for on top of that
+FRAMES_PER_LEVEL: int = 4
+RECURSION_BASE: int = 1000
+
 
 class Parser:
-    def __init__(self, scanner):
+    # nodes is the module the AST is built from: tau.asts, or tau.slim_asts
+    # for a tree with slotted nodes
+    def __init__(self, scanner, nodes: types.ModuleType = ast):
         self.scanner = scanner
+        self.nodes: types.ModuleType = nodes
+        self.simpleTypes: dict[
+            str, typing.Callable[[tokens.Token], ast.TypeAST]
+        ] = {
+            "void": nodes.VoidType,
+            "int": nodes.IntType,
+            "bool": nodes.BoolType,
+        }
+        self.peek = scanner.peek
+        self.consume = scanner.consume
+        # stmt -> whileStmt | compoundStmt | ifStmt | print | funcCall | varAssignment
+        self.stmtDispatch: dict[str, typing.Callable[[], ast.Stmt]] = {
+            "while": self._whileStmt,
+            "{": self._compoundStmt,
+            "if": self._ifStmt,
+            "print": self._print,
+            "call": self._funcCall,
+            "ID": self._varAssignment,
+        }
 
     def getSpan(self, startToken: ast.AST, endToken: ast.AST) -> ast.Span:
         start: tokens.Coord = startToken.span.start
@@ -16,97 +68,102 @@ class Parser:
         self, name: ast.IdExpr, list: list[ast.Expr], endTokens: list[ast.Token]
     ) -> ast.ArrayCell:
         span: ast.Span = ast.Span(name.span.start, endTokens[0].span.end)
-        res: ast.ArrayCell = ast.ArrayCell(name, list[0], span)
+        res: ast.ArrayCell = self.nodes.ArrayCell(name, list[0], span)
         for i in range(1, len(list)):
             span = ast.Span(
                 name.span.start,
                 endTokens[i].span.end,
             )
-            res = ast.ArrayCell(res, list[i], span)
+            res = self.nodes.ArrayCell(res, list[i], span)
         return res
 
     def error(self, msg: str):
-        error.error(msg, self.scanner.peek().span)
+        error.error(msg, self.peek().span)
 
     def match(self, kind: str) -> tokens.Token:
-        if self.current() != kind:
+        if self.peek().kind != kind:
             self.error(f"expected {kind}")
-        return self.scanner.consume()
+        return self.consume()
 
     def current(self):
-        return self.scanner.peek().kind
+        return self.peek().kind
 
     def parse(self) -> ast.Program:
         v = self._grammar()
         self.match("EOF")
         return v
 
+    # the recursion limit the passes need for the tree parse() built; a tree
+    # the recursive parser could build fits in the current one
+    def recursion_limit(self) -> int:
+        return sys.getrecursionlimit()
+
     # grammar -> funcDec { funcDec }
     def _grammar(self) -> ast.Program:
         decls: list["ast.FuncDecl"] = []
         decls.append(self._funcDec())
-        while self.current() in {"func"}:
+        while self.current() == "func":
             decls.append(self._funcDec())
         span = self.getSpan(decls[0], decls[-1])
-        _grammar_ = ast.Program(decls, span)
+        _grammar_ = self.nodes.Program(decls, span)
         return _grammar_
 
     # funcDec -> "func" ID "(" [ varNameType { "," varNameType } ] ")" [ ":" typeName ] compoundStmt
     def _funcDec(self) -> ast.FuncDecl:
         begin: ast.Token = self.match("func")
-        funcId: ast.Id = ast.Id(self.match("ID"))
+        funcId: ast.Id = self.nodes.Id(self.match("ID"))
         self.match("(")
         params: list[ast.ParamDecl] = []
-        if self.current() in {"ID"}:
+        if self.current() == "ID":
             id_Type: tuple[ast.Id, ast.TypeAST] = self._varNameType()
             paramId: ast.Id = id_Type[0]
             paramType: ast.TypeAST = id_Type[1]
-            paramDecl: ast.ParamDecl = ast.ParamDecl(
+            paramDecl: ast.ParamDecl = self.nodes.ParamDecl(
                 paramId, paramType, self.getSpan(paramId, paramType)
             )
             params.append(paramDecl)
-            while self.current() in {","}:
-                self.match(",")
+            while self.current() == ",":
+                self.consume()
                 id_Type: tuple[ast.Id, ast.TypeAST] = self._varNameType()
                 paramId: ast.Id = id_Type[0]
                 paramType: ast.TypeAST = id_Type[1]
-                paramDecl: ast.ParamDecl = ast.ParamDecl(
+                paramDecl: ast.ParamDecl = self.nodes.ParamDecl(
                     paramId, paramType, self.getSpan(paramId, paramType)
                 )
                 params.append(paramDecl)
         self.match(")")
         # set it to void if no return type is specified
-        retType: ast.TypeAST = ast.TypeAST()
-        if self.current() in {":"}:
-            self.match(":")
+        retType: ast.TypeAST = self.nodes.TypeAST()
+        if self.current() == ":":
+            self.consume()
             retType = self._typeName()
         body: ast.CompoundStmt = self._compoundStmt()
         span = ast.Span(begin.span.start, body.span.end)
-        _funcDec_ = ast.FuncDecl(funcId, params, retType, body, span)
+        _funcDec_ = self.nodes.FuncDecl(funcId, params, retType, body, span)
         return _funcDec_
 
     # funcCall -> "call" ID funcAssignCall
     def _funcCall(self) -> ast.CallStmt:
         begin: ast.Token = self.match("call")
-        id: ast.Id = ast.Id(self.match("ID"))
-        idExpr: ast.IdExpr = ast.IdExpr(id, id.span)
+        id: ast.Id = self.nodes.Id(self.match("ID"))
+        idExpr: ast.IdExpr = self.nodes.IdExpr(id, id.span)
         res: tuple[list[ast.Expr], ast.Token] = self._funcAssignCall()
         args: list[ast.Expr] = res[0]
         end: ast.Token = res[1]
         callStmtSpan: ast.Span = ast.Span(begin.span.start, end.span.end)
         callExprSpan: ast.Span = ast.Span(idExpr.span.start, end.span.end)
-        callExpr: ast.CallExpr = ast.CallExpr(idExpr, args, callExprSpan)
-        _funcCall_: ast.CallStmt = ast.CallStmt(callExpr, callStmtSpan)
+        callExpr: ast.CallExpr = self.nodes.CallExpr(idExpr, args, callExprSpan)
+        _funcCall_: ast.CallStmt = self.nodes.CallStmt(callExpr, callStmtSpan)
         return _funcCall_
 
     # funcAssignCall -> "(" [ (expr) { "," (expr) } ] ")"
     def _funcAssignCall(self) -> tuple[list[ast.Expr], ast.Token]:
         self.match("(")
         args: list[ast.Expr] = []
-        if self.current() in {"(", "-", "false", "not", "true", "ID", "INT"}:
+        if self.current() in FIRST_EXPR:
             args.append(self._expr())
-            while self.current() in {","}:
-                self.match(",")
+            while self.current() == ",":
+                self.consume()
                 args.append(self._expr())
         end: ast.Token = self.match(")")
         _funcAssignCall_ = args
@@ -117,34 +174,27 @@ class Parser:
         beginToken: ast.Token = self.match("{")
         varList: list[ast.VarDecl] = []
         stmtList: list[ast.Stmt] = []
-        while self.current() in {"var"}:
+        while self.current() == "var":
             varList.append(self._varDec())
-        while self.current() in {"call", "if", "print", "while", "{", "ID"}:
-            stmtList.append(self._stmt())
-        if self.current() in {"return"}:
+        stmtDispatch = self.stmtDispatch
+        production = stmtDispatch.get(self.current())
+        while production is not None:
+            stmtList.append(production())
+            production = stmtDispatch.get(self.current())
+        if self.current() == "return":
             stmtList.append(self._returnStmt())
         endToken = self.match("}")
         span = ast.Span(beginToken.span.start, endToken.span.end)
-        _compoundStmt_ = ast.CompoundStmt(varList, stmtList, span)
+        _compoundStmt_ = self.nodes.CompoundStmt(varList, stmtList, span)
         return _compoundStmt_
 
     # stmt -> whileStmt | compoundStmt | ifStmt | print | funcCall | varAssignment
     def _stmt(self) -> ast.Stmt:
-        if self.current() in {"while"}:
-            _stmt_ = self._whileStmt()
-        elif self.current() in {"{"}:
-            _stmt_ = self._compoundStmt()
-        elif self.current() in {"if"}:
-            _stmt_ = self._ifStmt()
-        elif self.current() in {"print"}:
-            _stmt_ = self._print()
-        elif self.current() in {"call"}:
-            _stmt_ = self._funcCall()
-        elif self.current() in {"ID"}:
-            _stmt_ = self._varAssignment()
-        else:
+        production = self.stmtDispatch.get(self.current())
+        if production is None:
             self.error("syntax error")
             assert False
+        _stmt_ = production()
         return _stmt_
 
     # returnStmt -> "return" (expr)
@@ -152,7 +202,7 @@ class Parser:
         begin: ast.Token = self.match("return")
         expresion: ast.Expr = self._expr()
         span = ast.Span(begin.span.start, expresion.span.end)
-        _returnStmt_ = ast.ReturnStmt(expresion, span)
+        _returnStmt_ = self.nodes.ReturnStmt(expresion, span)
         return _returnStmt_
 
     # whileStmt -> "while" expr compoundStmt
@@ -161,7 +211,7 @@ class Parser:
         expresson: ast.Expr = self._expr()
         compoundStmt: ast.CompoundStmt = self._compoundStmt()
         span: ast.Span = ast.Span(begin.span.start, compoundStmt.span.end)
-        _whileStmt_ = ast.WhileStmt(expresson, compoundStmt, span)
+        _whileStmt_ = self.nodes.WhileStmt(expresson, compoundStmt, span)
         return _whileStmt_
 
     # ifStmt -> "if" expr compoundStmt [ "else" compoundStmt ]
@@ -170,14 +220,14 @@ class Parser:
         expresson: ast.Expr = self._expr()
         compoundStmt: ast.CompoundStmt = self._compoundStmt()
         elseStmt: ast.Optional[ast.CompoundStmt] = None
-        if self.current() in {"else"}:
-            self.match("else")
+        if self.current() == "else":
+            self.consume()
             elseStmt = self._compoundStmt()
         endCoord: tokens.Coord = (
             elseStmt.span.end if elseStmt else compoundStmt.span.end
         )
         span: ast.Span = ast.Span(begin.span.start, endCoord)
-        _ifStmt_ = ast.IfStmt(expresson, compoundStmt, elseStmt, span)
+        _ifStmt_ = self.nodes.IfStmt(expresson, compoundStmt, elseStmt, span)
         return _ifStmt_
 
     # print -> "print" (expr)
@@ -185,14 +235,14 @@ class Parser:
         begin = self.match("print")
         expression: ast.Expr = self._expr()
         span = ast.Span(begin.span.start, expression.span.end)
-        _print_ = ast.PrintStmt(expression, span)
+        _print_ = self.nodes.PrintStmt(expression, span)
         return _print_
 
     # varAssignment -> ID [ arrayIndex ] "=" (expr)
     def _varAssignment(self) -> ast.AssignStmt:
-        id: ast.Id = ast.Id(self.match("ID"))
-        lhs: ast.IdExpr | ast.ArrayCell = ast.IdExpr(id, id.span)
-        if self.current() in {"["}:
+        id: ast.Id = self.nodes.Id(self.match("ID"))
+        lhs: ast.IdExpr | ast.ArrayCell = self.nodes.IdExpr(id, id.span)
+        if self.current() == "[":
             res: tuple[list[ast.Expr], list[ast.Token]] = self._arrayIndex()
             arrayCells: list[ast.Expr] = res[0]
             endTokens: list[ast.Token] = res[1]
@@ -201,113 +251,85 @@ class Parser:
             )
         self.match("=")
         rhs: ast.Expr = self._expr()
-        _varAssignment_ = ast.AssignStmt(
+        _varAssignment_ = self.nodes.AssignStmt(
             lhs, rhs, ast.Span(lhs.span.start, rhs.span.end)
         )
         return _varAssignment_
 
-    # expr -> expr1 { "or" expr1 }
-    def _expr(self) -> ast.Expr:
-        _expr_: ast.Expr = self._expr1()
-        while self.current() in {"or"}:
-            op: ast.Token = self.match("or")
-            right: ast.Expr = self._expr1()
-            span = self.getSpan(_expr_, right)
-            _expr_ = ast.BinaryOp(op, _expr_, right, span)
-        return _expr_
-
+    # expr  -> expr1 { "or" expr1 }
     # expr1 -> expr2 { "and" expr2 }
-    def _expr1(self) -> ast.Expr:
-        _expr_: ast.Expr = self._expr2()
-        while self.current() in {"and"}:
-            op: ast.Token = self.match("and")
-            right: ast.Expr = self._expr2()
-            _expr_ = ast.BinaryOp(op, _expr_, right, self.getSpan(_expr_, right))
-        return _expr_
-
     # expr2 -> expr3 { operators expr3 }
-    def _expr2(self) -> ast.Expr:
-        _expr_2: ast.Expr = self._expr3()
-        while self.current() in {"!=", "<", "<=", "==", ">", ">="}:
-            op: ast.Token = self._operators()
-            right: ast.Expr = self._expr3()
-            _expr_2 = ast.BinaryOp(op, _expr_2, right, self.getSpan(_expr_2, right))
-        return _expr_2
-
     # expr3 -> expr4 { subPlus expr4 }
-    def _expr3(self) -> ast.Expr:
-        _expr_3: ast.Expr = self._expr4()
-        while self.current() in {"+", "-"}:
-            op: ast.Token = self._subPlus()
-            right: ast.Expr = self._expr4()
-            _expr_3 = ast.BinaryOp(op, _expr_3, right, self.getSpan(_expr_3, right))
-        return _expr_3
-
     # expr4 -> base { DivTimes base }
-    def _expr4(self) -> ast.Expr:
-        _expr_4: ast.Expr = self._base()
-        while self.current() in {"*", "/"}:
-            op: ast.Token = self._DivTimes()
-            right: ast.Expr = self._base()
-            _expr_4 = ast.BinaryOp(op, _expr_4, right, self.getSpan(_expr_4, right))
-        return _expr_4
+    # All five levels are parsed by one precedence-climbing loop driven by
+    # BINDING_POWER; every operator is left associative.
+    def _expr(self, minPower: int = 1) -> ast.Expr:
+        _expr_: ast.Expr = self._base()
+        power: int = BINDING_POWER.get(self.current(), 0)
+        while power >= minPower:
+            op: ast.Token = self.consume()
+            right: ast.Expr = self._expr(power + 1)
+            span = ast.Span(_expr_.span.start, right.span.end)
+            _expr_ = self.nodes.BinaryOp(op, _expr_, right, span)
+            power = BINDING_POWER.get(self.current(), 0)
+        return _expr_
 
     # base -> [ "not" | "-" ] (ID [ funcAssignCall | arrayIndex ] | INT | bool | "(" expr ")")
     def _base(self) -> ast.Expr:
         unaryOpList: list[ast.Token] = []
-        while self.current() in {"-", "not"}:
-            if self.current() in {"not"}:
-                unaryOpList.append(self.match("not"))
-            elif self.current() in {"-"}:
-                unaryOpList.append(self.match("-"))
-            else:
-                self.error("syntax error")
-                assert False
-        if self.current() in {"ID"}:
-            id: ast.Id = ast.Id(self.match("ID"))
+        while self.current() in FIRST_UNARY:
+            unaryOpList.append(self.consume())
+        kind: str = self.current()
+        if kind == "ID":
+            id: ast.Id = self.nodes.Id(self.consume())
             spanStart: tokens.Coord = id.span.start
-            idExpr: ast.IdExpr = ast.IdExpr(id, self.getSpan(id, id))
+            idExpr: ast.IdExpr = self.nodes.IdExpr(id, self.getSpan(id, id))
             _base_ = idExpr
-            if self.current() in {"(", "["}:
-                if self.current() in {"("}:
+            if self.current() in FIRST_POSTFIX:
+                if self.current() == "(":
                     res1: tuple[list[ast.Expr], ast.Token] = self._funcAssignCall()
                     args: list[ast.Expr] = res1[0]
                     end = res1[1]
-                    _base_ = ast.CallExpr(
+                    _base_ = self.nodes.CallExpr(
                         idExpr,
                         args,
                         ast.Span(spanStart, end.span.end),
                     )
-                elif self.current() in {"["}:
+                elif self.current() == "[":
                     res: tuple[list[ast.Expr], list[ast.Token]] = self._arrayIndex()
                     _base_ = self.createArrayCell(idExpr, res[0], res[1])
                 else:
                     self.error("syntax error")
                     assert False
-        elif self.current() in {"INT"}:
-            int: ast.Token = self.match("INT")
+        elif kind == "INT":
+            int: ast.Token = self.consume()
             span = ast.Span(int.span.start, int.span.end)
-            _base_ = ast.IntLiteral(int, span)
-        elif self.current() in {"false", "true"}:
-            boolean: ast.Token = self._bool()
+            _base_ = self.nodes.IntLiteral(int, span)
+        elif kind in FIRST_BOOL:
+            boolean: ast.Token = self.consume()
             value: bool = boolean.value == "true"
             span = ast.Span(boolean.span.start, boolean.span.end)
-            _base_ = ast.BoolLiteral(boolean, value, span)
-        elif self.current() in {"("}:
-            self.match("(")
+            _base_ = self.nodes.BoolLiteral(boolean, value, span)
+        elif kind == "(":
+            self.consume()
             _base_ = self._expr()
             self.match(")")
         else:
             self.error("syntax error")
             assert False
+        return self.applyUnary(unaryOpList, _base_)
+
+    def applyUnary(
+        self, unaryOpList: list[ast.Token], _base_: ast.Expr
+    ) -> ast.Expr:
         for i in range(len(unaryOpList) - 1, -1, -1):
             op: ast.Token = unaryOpList[i]
             if i == 0 or i == len(unaryOpList) - 1:
-                _base_ = ast.UnaryOp(
+                _base_ = self.nodes.UnaryOp(
                     op, _base_, ast.Span(op.span.start, _base_.span.end)
                 )
             else:
-                _base_ = ast.UnaryOp(op, _base_, ast.Span(op.span.start, op.span.end))
+                _base_ = self.nodes.UnaryOp(op, _base_, ast.Span(op.span.start, op.span.end))
         return _base_
 
     # varDec -> "var" varNameType
@@ -317,12 +339,12 @@ class Parser:
         id: ast.Id = id_Type[0]
         type: ast.TypeAST = id_Type[1]
         span: ast.Span = ast.Span(beginToken.span.start, type.span.end)
-        _varDec_ = ast.VarDecl(id, type, span)
+        _varDec_ = self.nodes.VarDecl(id, type, span)
         return _varDec_
 
     # varNameType -> ID ":" typeName
     def _varNameType(self) -> typing.Tuple[ast.Id, ast.TypeAST]:
-        astId: ast.Id = ast.Id(self.match("ID"))
+        astId: ast.Id = self.nodes.Id(self.match("ID"))
         self.match(":")
         typeName: ast.TypeAST = self._typeName()
         return astId, typeName
@@ -333,89 +355,369 @@ class Parser:
         topIndex: ast.Expr = self._expr()
         indicies: list[ast.Expr] = [topIndex]
         endTokens: list[ast.Token] = [(self.match("]"))]
-        while self.current() in {"["}:
-            self.match("[")
+        while self.current() == "[":
+            self.consume()
             indicies.append(self._expr())
             endTokens.append(self.match("]"))
         return indicies, endTokens
 
-    # bool -> "true" | "false"
-    def _bool(self) -> ast.Token:
-        if self.current() in {"true"}:
-            _bool_ = self.match("true")
-        elif self.current() in {"false"}:
-            _bool_ = self.match("false")
-        else:
-            self.error("syntax error")
-            assert False
-        return _bool_
-
     # typeName -> "void" | "int" | "bool" | ("[" [ expr ] "]" typeName)
     def _typeName(self) -> ast.TypeAST:
-        if self.current() in {"void"}:
-            _typeName_ = self.match("void")
-            _typeName = ast.VoidType(_typeName_)
-            _typeName.span = _typeName_.span
-        elif self.current() in {"int"}:
-            _typeName_ = self.match("int")
-            _typeName = ast.IntType(_typeName_)
-            _typeName.span = _typeName_.span
-        elif self.current() in {"bool"}:
-            _typeName_ = self.match("bool")
-            _typeName = ast.BoolType(_typeName_)
-            _typeName.span = _typeName_.span
-        elif self.current() in {"["}:
-            beginToken: ast.Token = self.match("[")
+        kind: str = self.current()
+        if kind in self.simpleTypes:
+            _typeName = self.simpleTypes[kind](self.consume())
+        elif kind == "[":
+            beginToken: ast.Token = self.consume()
             size: ast.Optional["ast.Expr"] = None
-            if self.current() in {"(", "-", "false", "not", "true", "ID", "INT"}:
+            if self.current() in FIRST_EXPR:
                 size = self._expr()
             self.match("]")
             arrTypeName: ast.TypeAST = self._typeName()
             span = ast.Span(beginToken.span.start, arrTypeName.span.end)
-            arrType: ast.ArrayType = ast.ArrayType(size, arrTypeName, span)
+            arrType: ast.ArrayType = self.nodes.ArrayType(size, arrTypeName, span)
             _typeName = arrType
         else:
             self.error("syntax error")
             assert False
         return _typeName
 
-    # DivTimes -> "/" | "*"
-    def _DivTimes(self) -> ast.Token:
-        if self.current() in {"/"}:
-            _DivTimes_ = self.match("/")
-        elif self.current() in {"*"}:
-            _DivTimes_ = self.match("*")
-        else:
-            self.error("syntax error")
-            assert False
-        return _DivTimes_
-
-    # subPlus -> "-" | "+"
-    def _subPlus(self) -> ast.Token:
-        if self.current() in {"-"}:
-            _subPlus_ = self.match("-")
-        elif self.current() in {"+"}:
-            _subPlus_ = self.match("+")
-        else:
+
+# A "{" block still being parsed by IterativeParser, with the statement it is
+# the body of: "{" for a plain compound statement, "while", "if" or "else"
+class OpenBlock:
+    def __init__(
+        self,
+        owner: str,
+        begin: typing.Optional[ast.Token],
+        cond: typing.Optional[ast.Expr],
+        thenStmt: typing.Optional[ast.CompoundStmt],
+    ):
+        self.owner: str = owner
+        self.begin: typing.Optional[ast.Token] = begin
+        self.cond: typing.Optional[ast.Expr] = cond
+        self.thenStmt: typing.Optional[ast.CompoundStmt] = thenStmt
+        self.brace: typing.Optional[ast.Token] = None
+        self.varList: list[ast.VarDecl] = []
+        self.stmtList: list[ast.Stmt] = []
+
+
+# An expression still being parsed by IterativeParser: "" for the outermost
+# one, "(" for a parenthesized base, "call" for an argument list and "[" for
+# an index list of target
+class OpenGroup:
+    def __init__(
+        self,
+        kind: str,
+        unaryOpList: list[ast.Token],
+        target: typing.Optional[ast.IdExpr],
+    ):
+        self.kind: str = kind
+        # prefix operators that apply once the group is closed
+        self.unaryOpList: list[ast.Token] = unaryOpList
+        self.target: typing.Optional[ast.IdExpr] = target
+        self.items: list[ast.Expr] = []
+        self.endTokens: list[ast.Token] = []
+        self.operands: list[ast.Expr] = []
+        self.operators: list[ast.Token] = []
+
+
+# Parses the same grammar into the same trees as Parser, but keeps nested
+# blocks, expressions and array types on explicit stacks instead of the
+# Python call stack, so nesting depth is bounded only by memory. bindings,
+# typecheck, offsets and codegen still recurse once per level of the tree, so
+# recursion_limit() asks for FRAMES_PER_LEVEL frames for each level of the
+# deepest nesting it saw, for the caller to run the passes under with
+# tau.recursion.limit.
+class IterativeParser(Parser):
+    def __init__(self, scanner, nodes: types.ModuleType = ast):
+        super().__init__(scanner, nodes)
+        # the most blocks, and expression groups or array dimensions, open at
+        # once; their sum bounds the depth of the tree
+        self.blockDepth: int = 0
+        self.groupDepth: int = 0
+
+    def recursion_limit(self) -> int:
+        depth: int = self.blockDepth + self.groupDepth
+        return RECURSION_BASE + FRAMES_PER_LEVEL * depth
+
+    def openBlock(
+        self,
+        owner: str,
+        begin: typing.Optional[ast.Token],
+        cond: typing.Optional[ast.Expr],
+        thenStmt: typing.Optional[ast.CompoundStmt] = None,
+    ) -> OpenBlock:
+        block: OpenBlock = OpenBlock(owner, begin, cond, thenStmt)
+        block.brace = self.match("{")
+        while self.current() == "var":
+            block.varList.append(self._varDec())
+        return block
+
+    def closeBlock(self, block: OpenBlock, body: ast.CompoundStmt) -> ast.Stmt:
+        match block.owner:
+            case "{":
+                return body
+            case "while":
+                span = ast.Span(block.begin.span.start, body.span.end)
+                return self.nodes.WhileStmt(block.cond, body, span)
+            case "if":
+                span = ast.Span(block.begin.span.start, body.span.end)
+                return self.nodes.IfStmt(block.cond, body, None, span)
+            case "else":
+                span = ast.Span(block.begin.span.start, body.span.end)
+                return self.nodes.IfStmt(block.cond, block.thenStmt, body, span)
+            case _:
+                assert False, block.owner
+
+    # compoundStmt -> "{" { varDec } { stmt } [ returnStmt ] "}"
+    # whileStmt, ifStmt and nested compoundStmts open a new block on the
+    # stack instead of recursing
+    def _compoundStmt(self) -> ast.CompoundStmt:
+        stack: list[OpenBlock] = []
+        block: OpenBlock = self.openBlock("{", None, None)
+        stmtDispatch = self.stmtDispatch
+        while True:
+            kind: str = self.current()
+            if kind == "while" or kind == "if":
+                begin: ast.Token = self.consume()
+                cond: ast.Expr = self._expr()
+                stack.append(block)
+                self.blockDepth = max(self.blockDepth, len(stack))
+                block = self.openBlock(kind, begin, cond)
+            elif kind == "{":
+                stack.append(block)
+                self.blockDepth = max(self.blockDepth, len(stack))
+                block = self.openBlock(kind, None, None)
+            elif kind in stmtDispatch:
+                block.stmtList.append(stmtDispatch[kind]())
+            else:
+                if kind == "return":
+                    block.stmtList.append(self._returnStmt())
+                endToken: ast.Token = self.match("}")
+                span = ast.Span(block.brace.span.start, endToken.span.end)
+                body: ast.CompoundStmt = self.nodes.CompoundStmt(
+                    block.varList, block.stmtList, span
+                )
+                if block.owner == "if" and self.current() == "else":
+                    self.consume()
+                    block = self.openBlock("else", block.begin, block.cond, body)
+                    continue
+                stmt: ast.Stmt = self.closeBlock(block, body)
+                if not stack:
+                    return body
+                block = stack.pop()
+                block.stmtList.append(stmt)
+
+    # pop operators that bind at least as tightly as minPower
+    def reduce(self, group: OpenGroup, minPower: int):
+        operands: list[ast.Expr] = group.operands
+        operators: list[ast.Token] = group.operators
+        while operators and BINDING_POWER[operators[-1].kind] >= minPower:
+            op: ast.Token = operators.pop()
+            right: ast.Expr = operands.pop()
+            left: ast.Expr = operands.pop()
+            span = ast.Span(left.span.start, right.span.end)
+            operands.append(self.nodes.BinaryOp(op, left, right, span))
+
+    # expr -> base { binary operator base }, as in Parser._expr, with
+    # "(" expr ")", call arguments and array indices opening a new group
+    # instead of recursing
+    def _expr(self) -> ast.Expr:
+        stack: list[OpenGroup] = []
+        group: OpenGroup = OpenGroup("", [], None)
+        while True:
+            unaryOpList: list[ast.Token] = []
+            while self.current() in FIRST_UNARY:
+                unaryOpList.append(self.consume())
+            kind: str = self.current()
+            if kind == "(":
+                self.consume()
+                stack.append(group)
+                group = OpenGroup("(", unaryOpList, None)
+                continue
+            if kind == "ID":
+                id: ast.Id = self.nodes.Id(self.consume())
+                idExpr: ast.IdExpr = self.nodes.IdExpr(id, self.getSpan(id, id))
+                operand: ast.Expr = idExpr
+                if self.current() == "(":
+                    self.consume()
+                    if self.current() in FIRST_EXPR:
+                        stack.append(group)
+                        group = OpenGroup("call", unaryOpList, idExpr)
+                        continue
+                    end: ast.Token = self.match(")")
+                    span = ast.Span(id.span.start, end.span.end)
+                    operand = self.nodes.CallExpr(idExpr, [], span)
+                elif self.current() == "[":
+                    self.consume()
+                    stack.append(group)
+                    group = OpenGroup("[", unaryOpList, idExpr)
+                    continue
+            elif kind == "INT":
+                int: ast.Token = self.consume()
+                operand = self.nodes.IntLiteral(int, ast.Span(int.span.start, int.span.end))
+            elif kind in FIRST_BOOL:
+                boolean: ast.Token = self.consume()
+                value: bool = boolean.value == "true"
+                span = ast.Span(boolean.span.start, boolean.span.end)
+                operand = self.nodes.BoolLiteral(boolean, value, span)
+            else:
+                self.error("syntax error")
+                assert False
+            operand = self.applyUnary(unaryOpList, operand)
+            # shift the operand, then close every group it completes
+            while True:
+                group.operands.append(operand)
+                power: int = BINDING_POWER.get(self.current(), 0)
+                if power:
+                    self.reduce(group, power)
+                    group.operators.append(self.consume())
+                    break
+                self.reduce(group, 1)
+                finished: ast.Expr = group.operands.pop()
+                if group.kind == "":
+                    return finished
+                if group.kind == "(":
+                    self.match(")")
+                elif group.kind == "call":
+                    group.items.append(finished)
+                    if self.current() == ",":
+                        self.consume()
+                        break
+                    end: ast.Token = self.match(")")
+                    span = ast.Span(group.target.span.start, end.span.end)
+                    finished = self.nodes.CallExpr(group.target, group.items, span)
+                else:
+                    group.items.append(finished)
+                    group.endTokens.append(self.match("]"))
+                    if self.current() == "[":
+                        self.consume()
+                        break
+                    finished = self.createArrayCell(
+                        group.target, group.items, group.endTokens
+                    )
+                operand = self.applyUnary(group.unaryOpList, finished)
+                self.groupDepth = max(self.groupDepth, len(stack))
+                group = stack.pop()
+
+    # typeName -> "void" | "int" | "bool" | ("[" [ expr ] "]" typeName)
+    def _typeName(self) -> ast.TypeAST:
+        dimensions: list[tuple[ast.Token, typing.Optional[ast.Expr]]] = []
+        while self.current() == "[":
+            beginToken: ast.Token = self.consume()
+            size: ast.Optional["ast.Expr"] = None
+            if self.current() in FIRST_EXPR:
+                size = self._expr()
+            self.match("]")
+            dimensions.append((beginToken, size))
+        self.groupDepth = max(self.groupDepth, len(dimensions))
+        kind: str = self.current()
+        if kind not in self.simpleTypes:
             self.error("syntax error")
             assert False
-        return _subPlus_
-
-    # operators -> "<" | "<=" | "==" | "!=" | ">" | ">="
-    def _operators(self) -> ast.Token:
-        if self.current() in {"<"}:
-            _operators_ = self.match("<")
-        elif self.current() in {"<="}:
-            _operators_ = self.match("<=")
-        elif self.current() in {"=="}:
-            _operators_ = self.match("==")
-        elif self.current() in {"!="}:
-            _operators_ = self.match("!=")
-        elif self.current() in {">"}:
-            _operators_ = self.match(">")
-        elif self.current() in {">="}:
-            _operators_ = self.match(">=")
+        _typeName: ast.TypeAST = self.simpleTypes[kind](self.consume())
+        for beginToken, size in reversed(dimensions):
+            span = ast.Span(beginToken.span.start, _typeName.span.end)
+            _typeName = self.nodes.ArrayType(size, _typeName, span)
+        return _typeName
+
+
+# Raised by RecoveringParser.error to unwind to the nearest synchronization
+# point; the diagnostic itself has already been recorded
+class Panic(Exception):
+    pass
+
+
+# Panic-mode recovery: syntax errors are collected in self.diagnostics instead
+# of aborting, the statement or declaration being parsed is dropped and
+# parsing resumes at the next token in STMT_SYNC or FUNC_SYNC. parse() always
+# returns the partial Program. A lexical error ends the parse as the last
+# diagnostic.
+class RecoveringParser(Parser):
+    def __init__(self, scanner, nodes: types.ModuleType = ast):
+        super().__init__(scanner, nodes)
+        self.diagnostics: list[error.CompilerError] = []
+        # where parsing picked up again after each synchronization
+        self.resumed: list[tokens.Coord] = []
+
+    def error(self, msg: str):
+        span: ast.Span = self.peek().span
+        # one mistake often trips every enclosing production at the same token
+        if not self.diagnostics or self.diagnostics[-1].span != span:
+            self.diagnostics.append(error.CompilerError(msg, span))
+        raise Panic()
+
+    def synchronize(self, follow: frozenset[str]):
+        while self.current() not in follow:
+            self.consume()
+        self.resumed.append(self.peek().span.start)
+
+    def parse(self) -> ast.Program:
+        return self._grammar()
+
+    # grammar -> funcDec { funcDec }
+    def _grammar(self) -> ast.Program:
+        decls: list["ast.FuncDecl"] = []
+        try:
+            while True:
+                try:
+                    if self.current() != "func":
+                        self.error("expected EOF" if decls else "expected func")
+                    decls.append(self._funcDec())
+                except Panic:
+                    if self.current() != "func":
+                        self.consume()
+                    self.synchronize(FUNC_SYNC)
+                if self.current() == "EOF":
+                    break
+        except error.CompilerError as e:
+            # the scanner cannot resume after a lexical error
+            self.diagnostics.append(e)
+        if decls:
+            span = self.getSpan(decls[0], decls[-1])
         else:
-            self.error("syntax error")
-            assert False
-        return _operators_
+            span = self.diagnostics[0].span
+        _grammar_ = self.nodes.Program(decls, span)
+        return _grammar_
+
+    # compoundStmt -> "{" { varDec } { stmt } [ returnStmt ] "}"
+    def _compoundStmt(self) -> ast.CompoundStmt:
+        beginToken: ast.Token = self.match("{")
+        varList: list[ast.VarDecl] = []
+        stmtList: list[ast.Stmt] = []
+        while self.current() == "var":
+            try:
+                varList.append(self._varDec())
+            except Panic:
+                self.synchronize(STMT_SYNC | {"var"})
+        stmtDispatch = self.stmtDispatch
+        while True:
+            kind: str = self.current()
+            try:
+                if kind in stmtDispatch:
+                    stmtList.append(stmtDispatch[kind]())
+                    continue
+                if kind == "return":
+                    stmtList.append(self._returnStmt())
+                endToken: ast.Token = self.match("}")
+                end: tokens.Coord = endToken.span.end
+                break
+            except Panic:
+                if kind not in STMT_SYNC:
+                    # match("}") failed on a token no statement can start with
+                    self.consume()
+                self.synchronize(STMT_SYNC)
+                if self.current() in FUNC_SYNC:
+                    # the block is never closed; end it at what was parsed
+                    end = (stmtList or varList or [beginToken])[-1].span.end
+                    break
+        span = ast.Span(beginToken.span.start, end)
+        _compoundStmt_ = self.nodes.CompoundStmt(varList, stmtList, span)
+        return _compoundStmt_
+
+
+parsers: dict[str, type[Parser]] = {
+    "recursive": Parser,
+    "iterative": IterativeParser,
+    "recovering": RecoveringParser,
+}
@@ -1,14 +1,41 @@
+from array import array
+from collections import deque
+from typing import Generator, Iterator, Optional, Union
 from tau import tokens, error
 from tau.tokens import Span, Coord, Token, punctuation, keywords
+import mmap
+import re
 import string
 
 
+# a whole source file, either read as text or mapped from disk as bytes
+Source = Union[str, bytes, mmap.mmap]
+
+
 class Scanner:
-    def __init__(self, input: str):
+    # whether scan() can lex a bytes-like source without decoding it first
+    readsBytes: bool = False
+
+    def __init__(self, input: Source, lookahead: int = 1):
+        if not isinstance(input, str) and not self.readsBytes:
+            input = decode(input[:])
         self.input = input
-        self.tokenArray: list = []
         self.DELIMITERS: set = {" ", "(", ")"}
-        row: int = 1
+        # tokens are produced on demand; only the lookahead window is kept
+        self.lookahead: int = lookahead
+        self.buffer: deque[Token] = deque()
+        self.tokenStream: Iterator[Token] = self.scan(input)
+        self.last: Optional[Token] = None
+
+    def scan(self, input: str) -> Iterator[Token]:
+        row, column = yield from self.walk(input, 1)
+        EOF_cord: Coord = Coord(column, row)
+        EOF_span: Span = Span(EOF_cord, EOF_cord)
+        EOF_token: Token = Token("EOF", "", EOF_span)
+        yield EOF_token
+
+    # character-at-a-time reference lexer; returns the (row, column) reached
+    def walk(self, input: str, row: int) -> Generator[Token, None, tuple[int, int]]:
         column: int = 1
         i: int = 0
         tokenVal: str = ""
@@ -16,7 +43,7 @@ class Scanner:
             l = input[i]
             # If comment line interate i until out of comment line
             if input[i : i + 2] == '//':
-                self.createToken(tokenVal, row, column)
+                yield from self.createToken(tokenVal, row, column)
                 tokenVal = ""
                 while i < len(input) and input[i] != "\n":
                     i += 1
@@ -24,16 +51,16 @@ class Scanner:
                 row += 1
             # if newline reset column and iterate row
             elif l == "\n":
-                self.createToken(tokenVal, row, column)
+                yield from self.createToken(tokenVal, row, column)
                 tokenVal = ""
                 row += 1
                 column = 1
             elif l == " ":
-                self.createToken(tokenVal, row, column)
+                yield from self.createToken(tokenVal, row, column)
                 tokenVal = ""
                 column += 1
             elif l in punctuation or l == "!":
-                self.createToken(tokenVal, row, column)
+                yield from self.createToken(tokenVal, row, column)
                 column += 1
                 if (
                     l in {"!", "<", ">", "="}
@@ -41,18 +68,18 @@ class Scanner:
                     and input[i + 1] == "="
                 ):
                     column += 1
-                    self.createToken(l + "=", row, column)
+                    yield from self.createToken(l + "=", row, column)
                     i += 1
                     tokenVal = ""
                 elif l != "!":
-                    self.createToken(l, row, column)
+                    yield from self.createToken(l, row, column)
                     tokenVal = ""
                 else:
                     tokenVal += l
             elif l in string.ascii_letters:
                 # if we find a letter after an integer
                 if tokenVal and tokenVal[0].isdigit():
-                    self.createToken(tokenVal, row, column)
+                    yield from self.createToken(tokenVal, row, column)
                     tokenVal = ""
                 tokenVal += l
                 column += 1
@@ -79,17 +106,14 @@ class Scanner:
                     and input[i + 1] not in string.digits
                     and input[i + 1] not in string.ascii_letters
                 ):
-                    self.createToken(tokenVal, row, column)
+                    yield from self.createToken(tokenVal, row, column)
                     tokenVal = ""
             i += 1
-        EOF_cord: Coord = Coord(column, row)
-        EOF_span: Span = Span(EOF_cord, EOF_cord)
-        EOF_token: Token = Token("EOF", "", EOF_span)
-        self.tokenArray.append(EOF_token)
+        return row, column
 
-    def createToken(self, tokenVal, row, col):
+    def createToken(self, tokenVal, row, col) -> tuple[Token, ...]:
         if not tokenVal:
-            return
+            return ()
         if tokenVal in keywords or tokenVal in punctuation:
             tokenKind = tokenVal
         else:
@@ -98,10 +122,248 @@ class Scanner:
         token_end: Coord = Coord(col, row)
         token_span: Span = Span(token_start, token_end)
         token: Token = Token(tokenKind, tokenVal, token_span)
-        self.tokenArray.append(token)
+        return (token,)
+
+    def fill(self, count: int):
+        # pull tokens from the stream until the window holds count of them;
+        # once the stream is exhausted its final EOF token repeats
+        while len(self.buffer) < count:
+            self.last = next(self.tokenStream, self.last)
+            self.buffer.append(self.last)
+
+    def peek(self, ahead: int = 0) -> Token:
+        if len(self.buffer) > ahead:
+            return self.buffer[ahead]
+        assert ahead < self.lookahead, f"lookahead limited to {self.lookahead}"
+        self.fill(ahead + 1)
+        return self.buffer[ahead]
+
+    def consume(self) -> Token:
+        if self.buffer:
+            return self.buffer.popleft()
+        self.fill(1)
+        return self.buffer.popleft()
+
+
+# One master pattern built from the token tables.  Anything it cannot lex the
+# same way as Scanner.walk (a lone "!", a tab right after a word or number,
+# characters outside the language) falls into SLOW, and that line is handed
+# back to walk so both engines always produce the same tokens and errors.
+_PUNCT_PATTERN: str = "|".join(
+    re.escape(p) for p in sorted(punctuation, key=len, reverse=True)
+)
+_TOKEN_REGEX: str = (
+    r"(?P<WS>[ \t]+)"
+    r"|(?P<WORD>[A-Za-z][A-Za-z0-9]*+(?!\t))"
+    r"|(?P<INT>[0-9]++(?!\t))"
+    r"|(?P<COMMENT>//[^\n]*\n?)"
+    rf"|(?P<PUNCT>{_PUNCT_PATTERN})"
+    r"|(?P<NL>\n)"
+    r"|(?P<SLOW>.)"
+)
+TOKEN_PATTERN: re.Pattern = re.compile(_TOKEN_REGEX, re.DOTALL)
+# the same pattern over bytes, for sources mapped straight from disk
+BYTES_TOKEN_PATTERN: re.Pattern = re.compile(_TOKEN_REGEX.encode(), re.DOTALL)
+_TEXT_KINDS: dict[str | bytes, str] = {text: text for text in keywords + punctuation}
+_TEXT_KINDS.update({text.encode(): kind for text, kind in list(_TEXT_KINDS.items())})
+
+
+def decode(chunk: str | bytes) -> str:
+    return chunk if isinstance(chunk, str) else chunk.decode()
+
+
+class RegexScanner(Scanner):
+    readsBytes: bool = True
+
+    def scan(self, input: Source) -> Iterator[Token]:
+        pattern: re.Pattern = TOKEN_PATTERN
+        newline: str | bytes = "\n"
+        if not isinstance(input, str):
+            pattern, newline = BYTES_TOKEN_PATTERN, b"\n"
+        row: int = 1
+        column: int = 1
+        lineStart: int = 0
+        line: list[Token] = []
+        pos: int = 0
+        while True:
+            for m in pattern.finditer(input, pos):
+                group = m.lastgroup
+                if group == "WS":
+                    continue
+                start, end = m.span()
+                if group == "WORD":
+                    kind = _TEXT_KINDS.get(m.group(), "ID")
+                    value = decode(m.group()) if kind == "ID" else kind
+                elif group == "PUNCT":
+                    value = kind = _TEXT_KINDS[m.group()]
+                elif group == "INT":
+                    value = decode(m.group())
+                    kind = "INT"
+                elif group == "NL" or group == "COMMENT":
+                    yield from line
+                    line = []
+                    row += 1
+                    lineStart = end
+                    continue
+                else:
+                    break
+                col: int = start - lineStart + 1
+                span: Span = Span(Coord(col, row), Coord(col + end - start, row))
+                line.append(Token(kind, value, span))
+            else:
+                break
+            # relex the whole offending line with the reference engine
+            line = []
+            lineEnd: int = input.find(newline, lineStart)
+            lineEnd = len(input) if lineEnd == -1 else lineEnd + 1
+            row, column = yield from self.walk(decode(input[lineStart:lineEnd]), row)
+            lineStart = pos = lineEnd
+        if lineStart < len(input):
+            # an unterminated last line keeps walk's end-of-input behavior
+            row, column = yield from self.walk(decode(input[lineStart:]), row)
+        EOF_cord: Coord = Coord(column, row)
+        EOF_span: Span = Span(EOF_cord, EOF_cord)
+        EOF_token: Token = Token("EOF", "", EOF_span)
+        yield EOF_token
+
+
+_KIND_IDS: dict[str, int] = {kind: i for i, kind in enumerate(tokens.kinds)}
+
+
+# Columnar token storage: one int per field per token instead of a Token,
+# a Span and two Coords.  Values are sliced from the source on demand; the
+# rare token whose value is not a plain slice (see Scanner.walk) is kept in
+# extras.
+class TokenBuffer:
+    def __init__(self, source: Source):
+        self.source: Source = source
+        self.kinds: array = array("i")
+        self.starts: array = array("i")
+        self.ends: array = array("i")
+        self.lines: array = array("i")
+        self.cols: array = array("i")
+        self.extras: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def append(self, kind: str, start: int, end: int, line: int, col: int):
+        self.kinds.append(_KIND_IDS[kind])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.cols.append(col)
+
+    def kind(self, i: int) -> str:
+        return tokens.kinds[self.kinds[i]]
 
-    def peek(self) -> Token:
-        return self.tokenArray[0]
+    def value(self, i: int) -> str:
+        if i in self.extras:
+            return self.extras[i]
+        return decode(self.source[self.starts[i] : self.ends[i]])
+
+    def span(self, i: int) -> Span:
+        line: int = self.lines[i]
+        col: int = self.cols[i]
+        width: int = len(self.value(i))
+        return Span(Coord(col, line), Coord(col + width, line))
+
+    def token(self, i: int) -> Token:
+        return Token(self.kind(i), self.value(i), self.span(i))
+
+
+class ArrayScanner(RegexScanner):
+    def __init__(self, input: Source, lookahead: int = 1):
+        super().__init__(input, lookahead)
+        self.tokenBuffer: TokenBuffer = self.tokenize(input)
+        self.cursor: int = 0
+        self.currentToken: Optional[Token] = None
+
+    def tokenize(self, input: Source) -> TokenBuffer:
+        pattern: re.Pattern = TOKEN_PATTERN
+        newline: str | bytes = "\n"
+        if not isinstance(input, str):
+            pattern, newline = BYTES_TOKEN_PATTERN, b"\n"
+        buffer: TokenBuffer = TokenBuffer(input)
+        append = buffer.append
+        row: int = 1
+        column: int = 1
+        lineStart: int = 0
+        pos: int = 0
+        while True:
+            mark: int = len(buffer)
+            for m in pattern.finditer(input, pos):
+                group = m.lastgroup
+                if group == "WS":
+                    continue
+                start, end = m.span()
+                if group == "WORD":
+                    kind = _TEXT_KINDS.get(m.group(), "ID")
+                elif group == "PUNCT":
+                    kind = _TEXT_KINDS[m.group()]
+                elif group == "INT":
+                    kind = "INT"
+                elif group == "NL" or group == "COMMENT":
+                    row += 1
+                    lineStart = end
+                    mark = len(buffer)
+                    continue
+                else:
+                    break
+                append(kind, start, end, row, start - lineStart + 1)
+            else:
+                break
+            del buffer.kinds[mark:], buffer.starts[mark:], buffer.ends[mark:]
+            del buffer.lines[mark:], buffer.cols[mark:]
+            lineEnd: int = input.find(newline, lineStart)
+            lineEnd = len(input) if lineEnd == -1 else lineEnd + 1
+            row, column = self.walkInto(buffer, input, lineStart, lineEnd, row)
+            lineStart = pos = lineEnd
+        if lineStart < len(input):
+            del buffer.kinds[mark:], buffer.starts[mark:], buffer.ends[mark:]
+            del buffer.lines[mark:], buffer.cols[mark:]
+            row, column = self.walkInto(buffer, input, lineStart, len(input), row)
+        buffer.append("EOF", len(input), len(input), row, column)
+        return buffer
+
+    # relex input[lineStart:lineEnd] with the reference engine into buffer
+    def walkInto(
+        self, buffer: TokenBuffer, input: Source, lineStart: int, lineEnd: int, row: int
+    ) -> tuple[int, int]:
+        walker = self.walk(decode(input[lineStart:lineEnd]), row)
+        while True:
+            try:
+                token: Token = next(walker)
+            except StopIteration as stop:
+                return stop.value
+            start: int = lineStart + token.span.start.col - 1
+            end: int = start + len(token.value)
+            value: str | bytes = token.value
+            if not isinstance(input, str):
+                value = value.encode()
+            if input[start:end] != value:
+                buffer.extras[len(buffer)] = token.value
+            buffer.append(token.kind, start, end, token.span.start.line, token.span.start.col)
+
+    def peek(self, ahead: int = 0) -> Token:
+        if ahead == 0 and self.currentToken is not None:
+            return self.currentToken
+        i: int = min(self.cursor + ahead, len(self.tokenBuffer) - 1)
+        token: Token = self.tokenBuffer.token(i)
+        if ahead == 0:
+            self.currentToken = token
+        return token
 
     def consume(self) -> Token:
-        return self.tokenArray.pop(0)
+        token: Token = self.peek()
+        if self.cursor < len(self.tokenBuffer) - 1:
+            self.cursor += 1
+        self.currentToken = None
+        return token
+
+
+engines: dict[str, type[Scanner]] = {
+    "hand": Scanner,
+    "regex": RegexScanner,
+    "array": ArrayScanner,
+}
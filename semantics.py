@@ -0,0 +1,237 @@
+from tau import asts, symbols, error
+
+# bindings, typecheck and offsets fused into a single walk over the tree.
+# Every node is resolved, typed and given its frame offset on one visit, and
+# the annotations are the same as running bindings.bind, typecheck.program
+# and offsets.program in turn. Errors are raised in tree order, so a program
+# with more than one kind of error may report a different one first.
+
+
+def id(ast: asts.Id, ctx: symbols.Scope):
+    name: str = ast.token.value
+    symbol = ctx.lookup(name)
+    if symbol is None:
+        error.error(f"Undefined identifier {name}", ast.span)
+    ast.symbol = symbol
+    ast.semantic_type = ast.symbol.get_type()
+
+
+def idexpr(ast: asts.IdExpr, ctx: symbols.Scope):
+    id(ast.id, ctx)
+    ast.semantic_type = ast.id.semantic_type
+
+
+def callexpr(ast: asts.CallExpr, ctx: symbols.Scope):
+    expr(ast.fn, ctx)
+    if isinstance(ast.fn.semantic_type, symbols.FuncType):
+        ast.semantic_type = ast.fn.semantic_type.ret
+        if len(ast.args) != len(ast.fn.semantic_type.params):
+            error.error(f"Wrong number of arguments for function {ast.fn}", ast.span)
+    for arg in ast.args:
+        expr(arg, ctx)
+
+
+def arraycell(ast: asts.ArrayCell, ctx: symbols.Scope):
+    expr(ast.arr, ctx)
+    expr(ast.idx, ctx)
+    if ast.idx.semantic_type is not symbols.INT:
+        error.error("Array index must be int", ast.idx.span)
+    ast.semantic_type = symbols.INT
+
+
+def binaryop(ast: asts.BinaryOp, ctx: symbols.Scope):
+    expr(ast.left, ctx)
+    expr(ast.right, ctx)
+    if ast.op.value in {"+", "-", "*", "/"}:
+        if ast.left.semantic_type is not symbols.INT:
+            error.error("Binary operation is valid for int only", ast.left.span)
+        elif ast.right.semantic_type is not symbols.INT:
+            error.error("Binary operation is valid for int only", ast.right.span)
+        ast.semantic_type = symbols.INT
+    elif ast.op.value in {"<", ">", "<=", ">=", "==", "!=", "and", "or"}:
+        if ast.op.value in {"<", ">", "<=", ">=", "==", "!="}:
+            if ast.left.semantic_type is not ast.right.semantic_type:
+                error.error("Binary operation is valid for same types only", ast.span)
+        if ast.op.value in {"and", "or"}:
+            if ast.left.semantic_type is not symbols.BOOL:
+                error.error("Binary operation is valid for bool only", ast.left.span)
+            elif ast.right.semantic_type is not symbols.BOOL:
+                error.error("Binary operation is valid for bool only", ast.right.span)
+        if ast.left.semantic_type is not ast.right.semantic_type:
+            error.error("Binary operation is valid for same types only", ast.span)
+        ast.semantic_type = symbols.BOOL
+
+
+def unaryop(ast: asts.UnaryOp, ctx: symbols.Scope):
+    expr(ast.expr, ctx)
+    if ast.op.value in {"-"}:
+        ast.semantic_type = symbols.INT
+    elif ast.op.value in {"not"}:
+        ast.semantic_type = symbols.BOOL
+
+
+# cases are ordered by how often they occur in typical programs
+def expr(ast: asts.Expr, ctx: symbols.Scope):
+    match ast:
+        case asts.IdExpr():
+            idexpr(ast, ctx)
+        case asts.IntLiteral():
+            ast.semantic_type = symbols.INT
+        case asts.BinaryOp():
+            binaryop(ast, ctx)
+        case asts.CallExpr():
+            callexpr(ast, ctx)
+        case asts.ArrayCell():
+            arraycell(ast, ctx)
+        case asts.BoolLiteral():
+            ast.semantic_type = symbols.BOOL
+        case asts.UnaryOp():
+            unaryop(ast, ctx)
+        case _:
+            error.error(f"expr() not implemented for {ast.__class__}", ctx.span)
+
+
+def arraytype(ast: asts.ArrayType, ctx: symbols.Scope):
+    if ast.size is not None:
+        expr(ast.size, ctx)
+        if ast.size.semantic_type is not symbols.INT:
+            error.error("Array size must be int", ast.size.span)
+    typ(ast.element_type_ast, ctx)
+    ast.semantic_type = symbols.array_type(ast.element_type_ast.semantic_type)
+
+
+def typ(ast: asts.TypeAST, ctx: symbols.Scope):
+    match ast:
+        case asts.IntType():
+            ast.semantic_type = symbols.INT
+        case asts.BoolType():
+            ast.semantic_type = symbols.BOOL
+        case asts.ArrayType():
+            arraytype(ast, ctx)
+        case asts.VoidType():
+            ast.semantic_type = symbols.VOID
+        case _:
+            error.error(f"typ() not implemented for {ast.__class__}", ctx.span)
+
+
+# ParamDecl and VarDecl are handled alike
+def decl(ast: asts.Decl, ctx: symbols.Scope, offset: int):
+    id(ast.id, ctx)
+    typ(ast.type_ast, ctx)
+    ast.id.semantic_type = ast.type_ast.semantic_type
+    ast.id.symbol.set_type(ast.id.semantic_type)
+    ast.id.symbol.offset = offset
+    ast.semantic_type = ast.type_ast.semantic_type
+
+
+def compoundstmt(
+    ast: asts.CompoundStmt, ctx: symbols.Scope, retType: symbols.SemanticType, offset: int
+) -> int:
+    scope = symbols.LocalScope(ctx, ast.span)
+    ast.local_scope = scope
+    table = ctx.table
+    table.open(scope)
+    max_offset = offset
+    for d in ast.decls:
+        name = d.id.token.value
+        table.declare(name, symbols.IdSymbol(name, scope))
+        decl(d, scope, offset)
+        offset += 1
+    for s in ast.stmts:
+        max_offset = max(stmt(s, scope, retType, offset), max_offset)
+    max_offset = max(max_offset, offset)
+    table.close()
+    return max_offset
+
+
+def ifstmt(
+    ast: asts.IfStmt, ctx: symbols.Scope, retType: symbols.SemanticType, offset: int
+):
+    expr(ast.expr, ctx)
+    if ast.expr.semantic_type is not symbols.BOOL:
+        error.error("If condition must be bool", ast.expr.span)
+    stmt(ast.thenStmt, ctx, retType, offset)
+    if ast.elseStmt is not None:
+        stmt(ast.elseStmt, ctx, retType, offset)
+
+
+def whilestmt(
+    ast: asts.WhileStmt, ctx: symbols.Scope, retType: symbols.SemanticType, offset: int
+):
+    expr(ast.expr, ctx)
+    if ast.expr.semantic_type is not symbols.BOOL:
+        error.error("While condition must be bool", ast.expr.span)
+    stmt(ast.stmt, ctx, retType, offset)
+
+
+def returnstmt(
+    ast: asts.ReturnStmt, ctx: symbols.Scope, retType: symbols.SemanticType
+):
+    if ast.expr is not None:
+        expr(ast.expr, ctx)
+        ast.enclosing_scope = ctx
+        if ast.expr.semantic_type is not retType:
+            error.error("Return type mismatch", ast.expr.span)
+
+
+# returns the highest frame offset the statement needs, as offsets.stmt does
+def stmt(
+    ast: asts.Stmt, ctx: symbols.Scope, retType: symbols.SemanticType, offset: int
+) -> int:
+    paramSize: int = 0
+    match ast:
+        case asts.AssignStmt():
+            expr(ast.lhs, ctx)
+            expr(ast.rhs, ctx)
+            if ast.lhs.semantic_type is not ast.rhs.semantic_type:
+                error.error("Assign type mismatch", ast.lhs.span)
+        case asts.IfStmt():
+            ifstmt(ast, ctx, retType, offset)
+        case asts.WhileStmt():
+            whilestmt(ast, ctx, retType, offset)
+        case asts.PrintStmt():
+            expr(ast.expr, ctx)
+        case asts.CallStmt():
+            callexpr(ast.call, ctx)
+            paramSize += len(ast.call.args)
+        case asts.CompoundStmt():
+            paramSize = compoundstmt(ast, ctx, retType, offset)
+        case asts.ReturnStmt():
+            returnstmt(ast, ctx, retType)
+        case _:
+            error.error(f"stmt() not implemented for {ast.__class__}", ast.span)
+    return paramSize
+
+
+def funcdecl(ast: asts.FuncDecl, ctx: symbols.Scope):
+    id(ast.id, ctx)
+    # create the function scope
+    scope = symbols.FuncScope(ctx, ast.span)
+    ast.func_scope = scope
+    table = ctx.table
+    table.open(scope)
+    params: list[symbols.SemanticType] = []
+    for numParams, param in enumerate(ast.params):
+        name = param.id.token.value
+        table.declare(name, symbols.IdSymbol(name, scope))
+        decl(param, scope, -2 - numParams)
+        params.append(param.type_ast.semantic_type)
+    typ(ast.ret_type_ast, scope)
+    ast.id.semantic_type = symbols.func_type(params, ast.ret_type_ast.semantic_type)
+    ast.id.symbol.set_type(ast.id.semantic_type)
+    max_offset = compoundstmt(ast.body, scope, ast.ret_type_ast.semantic_type, 3)
+    ast.size = max_offset + 4  # +1 for return address +3 for bookkeeping
+    table.close()
+
+
+def program(ast: asts.Program):
+    scope = symbols.GlobalScope(ast.span)
+    table = symbols.SymbolTable()
+    table.open(scope)
+    for d in ast.decls:
+        name = d.id.token.value
+        if name == "main" and name in scope.symtab:
+            error.error("main function already declared", d.id.span)
+        table.declare(name, symbols.IdSymbol(name, scope))
+        funcdecl(d, scope)
+    table.close()
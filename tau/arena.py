@@ -0,0 +1,267 @@
+from array import array
+from typing import Iterator, Optional
+
+from . import asts
+from .tokens import Token, Span, Coord, kinds as tokenKinds
+from .symbols import SemanticType, PhonyType
+
+# A parsed program stored column-wise: node i is described by kinds[i],
+# firstChild[i], nextSibling[i], tokenIndex[i], typeIndex[i] and four span
+# ints, instead of by one heap object. Nodes are numbered in pre-order, so
+# every child has a larger index than its parent and expand() can rebuild the
+# tree bottom-up with a single backwards sweep. Tokens are stored column-wise
+# too, so an Arena pickles as a few raw byte arrays plus the token strings,
+# which makes it cheap to cache or send to another process.
+
+# "List" groups a variable number of children (decls, params, stmts, args)
+# and "Nothing" stands for an absent optional child
+KINDS: list[str] = [
+    "Program",
+    "FuncDecl",
+    "Id",
+    "VarDecl",
+    "ParamDecl",
+    "TypeAST",
+    "IntType",
+    "BoolType",
+    "VoidType",
+    "ArrayType",
+    "PrintStmt",
+    "CompoundStmt",
+    "CallStmt",
+    "AssignStmt",
+    "IfStmt",
+    "WhileStmt",
+    "ReturnStmt",
+    "CallExpr",
+    "BinaryOp",
+    "UnaryOp",
+    "ArrayCell",
+    "IdExpr",
+    "IntLiteral",
+    "BoolLiteral",
+    "List",
+    "Nothing",
+]
+KIND_IDS: dict[str, int] = {kind: i for i, kind in enumerate(KINDS)}
+NO_NODE: int = -1
+TOKEN_KIND_IDS: dict[str, int] = {kind: i for i, kind in enumerate(tokenKinds)}
+
+
+# The children of node in constructor order: AST nodes, lists and Nones
+def fields(node: asts.AST) -> list:
+    match node:
+        case asts.Program():
+            return [node.decls]
+        case asts.FuncDecl():
+            return [node.id, node.params, node.ret_type_ast, node.body]
+        case asts.VarDecl() | asts.ParamDecl():
+            return [node.id, node.type_ast]
+        case asts.ArrayType():
+            return [node.size, node.element_type_ast]
+        case asts.PrintStmt():
+            return [node.expr]
+        case asts.CompoundStmt():
+            return [node.decls, node.stmts]
+        case asts.CallStmt():
+            return [node.call]
+        case asts.AssignStmt():
+            return [node.lhs, node.rhs]
+        case asts.IfStmt():
+            return [node.expr, node.thenStmt, node.elseStmt]
+        case asts.WhileStmt():
+            return [node.expr, node.stmt]
+        case asts.ReturnStmt():
+            return [node.expr]
+        case asts.CallExpr():
+            return [node.fn, node.args]
+        case asts.BinaryOp():
+            return [node.left, node.right]
+        case asts.UnaryOp():
+            return [node.expr]
+        case asts.ArrayCell():
+            return [node.arr, node.idx]
+        case asts.IdExpr():
+            return [node.id]
+        case _:
+            return []
+
+
+class Arena:
+    def __init__(self):
+        self.kinds: array = array("i")
+        self.firstChild: array = array("i")
+        self.nextSibling: array = array("i")
+        self.tokenIndex: array = array("i")
+        self.typeIndex: array = array("i")
+        # start col, start line, end col, end line; -1s for no span
+        self.spans: array = array("i")
+        self.tokenKinds: array = array("i")
+        self.tokenValues: list[str] = []
+        self.tokenSpans: array = array("i")
+        self.types: list[SemanticType] = []
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind(self, i: int) -> str:
+        return KINDS[self.kinds[i]]
+
+    def children(self, i: int) -> Iterator[int]:
+        child: int = self.firstChild[i]
+        while child != NO_NODE:
+            yield child
+            child = self.nextSibling[child]
+
+    def token(self, i: int) -> Optional[Token]:
+        index: int = self.tokenIndex[i]
+        if index == NO_NODE:
+            return None
+        startCol, startLine, endCol, endLine = self.tokenSpans[
+            4 * index : 4 * index + 4
+        ]
+        span = Span(Coord(startCol, startLine), Coord(endCol, endLine))
+        kind: str = tokenKinds[self.tokenKinds[index]]
+        return Token(kind, self.tokenValues[index], span)
+
+    def addToken(self, token: Token) -> int:
+        start, end = token.span
+        self.tokenKinds.append(TOKEN_KIND_IDS[token.kind])
+        self.tokenValues.append(token.value)
+        self.tokenSpans.extend((start.col, start.line, end.col, end.line))
+        return len(self.tokenValues) - 1
+
+    def semantic_type(self, i: int) -> Optional[SemanticType]:
+        index: int = self.typeIndex[i]
+        return self.types[index] if index != NO_NODE else None
+
+    def span(self, i: int) -> Optional[Span]:
+        startCol, startLine, endCol, endLine = self.spans[4 * i : 4 * i + 4]
+        if startCol == NO_NODE:
+            return None
+        return Span(Coord(startCol, startLine), Coord(endCol, endLine))
+
+    # Rebuild the tree from nodes (tau.asts or tau.slim_asts). Semantic types
+    # are restored; symbols and scopes are not stored and stay phony.
+    def expand(self, nodes=asts) -> asts.Program:
+        built: list = [None] * len(self)
+        for i in range(len(self) - 1, -1, -1):
+            kids: list = [built[child] for child in self.children(i)]
+            token: Optional[Token] = self.token(i)
+            span: Optional[Span] = self.span(i)
+            match KINDS[self.kinds[i]]:
+                case "List":
+                    node = kids
+                case "Nothing":
+                    node = None
+                case "Program":
+                    node = nodes.Program(kids[0], span)
+                case "FuncDecl":
+                    node = nodes.FuncDecl(*kids, span)
+                case "Id":
+                    node = nodes.Id(token)
+                case "VarDecl":
+                    node = nodes.VarDecl(kids[0], kids[1], span)
+                case "ParamDecl":
+                    node = nodes.ParamDecl(kids[0], kids[1], span)
+                case "TypeAST":
+                    node = nodes.TypeAST()
+                case "IntType":
+                    node = nodes.IntType(token)
+                case "BoolType":
+                    node = nodes.BoolType(token)
+                case "VoidType":
+                    node = nodes.VoidType(token)
+                case "ArrayType":
+                    node = nodes.ArrayType(kids[0], kids[1], span)
+                case "PrintStmt":
+                    node = nodes.PrintStmt(kids[0], span)
+                case "CompoundStmt":
+                    node = nodes.CompoundStmt(kids[0], kids[1], span)
+                case "CallStmt":
+                    node = nodes.CallStmt(kids[0], span)
+                case "AssignStmt":
+                    node = nodes.AssignStmt(kids[0], kids[1], span)
+                case "IfStmt":
+                    node = nodes.IfStmt(kids[0], kids[1], kids[2], span)
+                case "WhileStmt":
+                    node = nodes.WhileStmt(kids[0], kids[1], span)
+                case "ReturnStmt":
+                    node = nodes.ReturnStmt(kids[0], span)
+                case "CallExpr":
+                    node = nodes.CallExpr(kids[0], kids[1], span)
+                case "BinaryOp":
+                    node = nodes.BinaryOp(token, kids[0], kids[1], span)
+                case "UnaryOp":
+                    node = nodes.UnaryOp(token, kids[0], span)
+                case "ArrayCell":
+                    node = nodes.ArrayCell(kids[0], kids[1], span)
+                case "IdExpr":
+                    node = nodes.IdExpr(kids[0], span)
+                case "IntLiteral":
+                    node = nodes.IntLiteral(token, span)
+                case "BoolLiteral":
+                    node = nodes.BoolLiteral(token, token.value == "true", span)
+                case kind:
+                    assert False, kind
+            semantic_type: Optional[SemanticType] = self.semantic_type(i)
+            if semantic_type is not None:
+                node.semantic_type = semantic_type
+            built[i] = node
+        return built[0]
+
+
+def flatten(tree: asts.Program) -> Arena:
+    arena: Arena = Arena()
+    # the last child linked so far under each node
+    lastChild: array = array("i")
+    # semantic types are shared by identity, as the passes left them
+    typeIds: dict[int, int] = {}
+    stack: list[tuple[object, int]] = [(tree, NO_NODE)]
+    while stack:
+        node, parent = stack.pop()
+        i: int = len(arena)
+        if parent != NO_NODE:
+            if arena.firstChild[parent] == NO_NODE:
+                arena.firstChild[parent] = i
+            else:
+                arena.nextSibling[lastChild[parent]] = i
+            lastChild[parent] = i
+        arena.firstChild.append(NO_NODE)
+        arena.nextSibling.append(NO_NODE)
+        lastChild.append(NO_NODE)
+        tokenIndex: int = NO_NODE
+        typeIndex: int = NO_NODE
+        span: Optional[Span] = None
+        if node is None:
+            kind: str = "Nothing"
+            children: list = []
+        elif isinstance(node, list):
+            kind = "List"
+            children = node
+        else:
+            kind = node.__class__.__name__
+            children = fields(node)
+            span = getattr(node, "span", None)
+            token: Optional[Token] = getattr(
+                node, "token", getattr(node, "op", None)
+            )
+            if token is not None:
+                tokenIndex = arena.addToken(token)
+            semantic_type = getattr(node, "semantic_type", None)
+            if not isinstance(semantic_type, (PhonyType, type(None))):
+                if id(semantic_type) not in typeIds:
+                    typeIds[id(semantic_type)] = len(arena.types)
+                    arena.types.append(semantic_type)
+                typeIndex = typeIds[id(semantic_type)]
+        arena.kinds.append(KIND_IDS[kind])
+        arena.tokenIndex.append(tokenIndex)
+        arena.typeIndex.append(typeIndex)
+        if span is None:
+            arena.spans.extend((NO_NODE, NO_NODE, NO_NODE, NO_NODE))
+        else:
+            start, end = span
+            arena.spans.extend((start.col, start.line, end.col, end.line))
+        for child in reversed(children):
+            stack.append((child, i))
+    return arena
@@ -0,0 +1,426 @@
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+from typing import Callable, List, Optional
+
+
+def generate_function(index: int, statements: int) -> str:
+    lines: List[str] = [
+        f"func f{index}(a: int, b: int): int {{",
+        "    var x: int",
+        "    var y: int",
+        "    var ok: bool",
+        "    x = a",
+        "    y = 0",
+    ]
+    for k in range(statements):
+        lines.append(f"    y = y + x * {k % 7 + 1} - (a / {k % 5 + 1})")
+        lines.append(f"    ok = y > {k} and not (x == b) or a <= b")
+        lines.append("    if ok { y = y - 1 } else { y = -y + 2 }")
+    lines.append("    while x > 0 {")
+    lines.append("        x = x - 1")
+    lines.append("    }")
+    lines.append("    return y")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+# A well-typed program that compiles through codegen and runs on the VM
+def generate_program(functions: int, statements: int) -> str:
+    decls: List[str] = [generate_function(i, statements) for i in range(functions)]
+    main: List[str] = [
+        "func main(): void {",
+        "    var total: int",
+        "    total = 0",
+    ]
+    for i in range(functions):
+        main.append(f"    total = total + f{i}({i % 9 + 1}, {i % 4})")
+    main.append("    print total")
+    main.append("}")
+    decls.append("\n".join(main))
+    return "\n".join(decls) + "\n"
+
+
+# Blocks nested depth deep (cycling while / if / plain block), each guarding
+# an expression wrapped in depth parentheses at the innermost level
+def generate_nested(depth: int) -> str:
+    opens: List[str] = ["while x > 0 {", "if x > 0 {", "{"]
+    lines: List[str] = [
+        "func main(): void {",
+        "    var x: int",
+        "    x = 1",
+    ]
+    lines.extend(opens[k % 3] for k in range(depth))
+    lines.append("x = " + "(" * depth + "x - 1" + ")" * depth)
+    lines.extend("}" for _ in range(depth))
+    lines.append("    print x")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+# CPU-bound programs for the VM engines: a tight arithmetic loop and a
+# recursive, call-heavy function
+def generate_loop(iterations: int) -> str:
+    return "\n".join(
+        [
+            "func main(): void {",
+            "    var i: int",
+            "    var s: int",
+            "    i = 0",
+            "    s = 0",
+            f"    while i < {iterations} {{",
+            "        s = s + i * 3 - (i / 7)",
+            "        if s > 1000000 { s = s - 1000000 } else { s = -s + 2 }",
+            "        i = i + 1",
+            "    }",
+            "    print s",
+            "}",
+        ]
+    ) + "\n"
+
+
+def generate_fib(n: int) -> str:
+    return "\n".join(
+        [
+            "func fib(n: int): int {",
+            "    if n < 2 { return n }",
+            "    return fib(n - 1) + fib(n - 2)",
+            "}",
+            "func main(): void {",
+            f"    print fib({n})",
+            "}",
+        ]
+    ) + "\n"
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    best: Optional[float] = None
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        fn()
+        elapsed: float = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    assert best is not None
+    return best
+
+
+def count_tokens(source: str) -> int:
+    import scanner
+
+    lexer = scanner.RegexScanner(source)
+    count: int = 1
+    while lexer.consume().kind != "EOF":
+        count += 1
+    return count
+
+
+def bench_parse(source: str, lexers: List[str], repeat: int):
+    import scanner
+    import parse
+
+    tokens: int = count_tokens(source)
+    print(f"parse: {len(source)} chars, {tokens} tokens, best of {repeat}")
+    for lexer in lexers:
+        engine = scanner.engines[lexer]
+        elapsed: float = best_time(
+            lambda: parse.Parser(engine(source)).parse(), repeat
+        )
+        print(f"  {lexer:8} {elapsed:8.3f}s  {tokens / elapsed:12,.0f} tokens/s")
+
+
+def bench_deep(source: str, parsers: List[str], repeat: int):
+    import scanner
+    import parse
+
+    tokens: int = count_tokens(source)
+    print(f"deep: {len(source)} chars, {tokens} tokens, best of {repeat}")
+    for name in parsers:
+        engine = parse.parsers[name]
+        try:
+            elapsed: float = best_time(
+                lambda: engine(scanner.RegexScanner(source)).parse(), repeat
+            )
+        except RecursionError:
+            print(f"  {name:10} RecursionError")
+            continue
+        print(f"  {name:10} {elapsed:8.3f}s  {tokens / elapsed:12,.0f} tokens/s")
+
+
+def bench_semantics(source: str, repeat: int):
+    import scanner
+    import parse
+    import bindings
+    import typecheck
+    import offsets
+    import semantics
+
+    def separate(tree):
+        bindings.bind(tree)
+        typecheck.program(tree)
+        offsets.program(tree)
+
+    print(f"semantics: {len(source)} chars, best of {repeat}")
+    for name, analyze in (("separate", separate), ("fused", semantics.program)):
+        best: Optional[float] = None
+        for _ in range(repeat):
+            tree = parse.Parser(scanner.RegexScanner(source)).parse()
+            elapsed: float = best_time(lambda: analyze(tree), 1)
+            if best is None or elapsed < best:
+                best = elapsed
+        print(f"  {name:10} {best:8.3f}s")
+
+
+def bench_incremental(source: str, repeat: int):
+    import incremental
+
+    # change one constant in the middle function
+    middle: int = source.index("func ", len(source) // 2)
+    edited: str = source[:middle] + source[middle:].replace("y = 0", "y = 1", 1)
+    print(f"incremental: {len(source)} chars, one function edited, best of {repeat}")
+    full: float = best_time(lambda: incremental.Compiler().compile(edited), repeat)
+    print(f"  {'full':12} {full:8.3f}s")
+    best: Optional[float] = None
+    for _ in range(repeat):
+        compiler = incremental.Compiler()
+        compiler.compile(source)
+        elapsed: float = best_time(lambda: compiler.compile(edited), 1)
+        if best is None or elapsed < best:
+            best = elapsed
+    print(
+        f"  {'incremental':12} {best:8.3f}s"
+        f"  {compiler.reused} reused, {compiler.rebuilt} rebuilt"
+    )
+
+
+def bench_vm(programs: dict[str, str], engines: List[str], repeat: int, fuse: bool):
+    import scanner
+    import parse
+    import semantics
+    import codegen
+    from .vm import vm_utils, fuse as superinsns
+
+    print(f"vm: best of {repeat}")
+    for name, source in programs.items():
+        tree = parse.Parser(scanner.Scanner(source)).parse()
+        semantics.program(tree)
+        insns = codegen.generate(tree)
+        variants: List[tuple[str, list]] = [("", insns)]
+        if fuse:
+            variants.append(("+fuse", superinsns.fuse(insns)))
+        print(
+            f"  {name} ("
+            + ", ".join(f"{len(code):,}{suffix}" for suffix, code in variants)
+            + " instructions)"
+        )
+        baseline: Optional[float] = None
+        for suffix, code in variants:
+            for engine in engines:
+
+                def run():
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        vm_utils.invoke_vm(code, [], False, engine)
+
+                elapsed: float = best_time(run, repeat)
+                if baseline is None:
+                    baseline = elapsed
+                label: str = engine + suffix
+                print(f"    {label:15} {elapsed:8.3f}s  {baseline / elapsed:5.1f}x")
+
+
+def count_nodes(tree) -> int:
+    from .compare import assert_equal
+
+    count: int = 0
+
+    def visit(node, other) -> bool:
+        nonlocal count
+        count += 1
+        return True
+
+    assert_equal(tree, tree, visit)
+    return count
+
+
+def bench_memory(source: str):
+    import scanner
+    import parse
+    from . import asts, slim_asts
+
+    print(f"memory: {len(source)} chars")
+    perNode: List[float] = []
+    for name, nodes in (("asts", asts), ("slim_asts", slim_asts)):
+        lexer = scanner.Scanner(source)
+        tracemalloc.start()
+        tree = parse.Parser(lexer, nodes).parse()
+        retained: int = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        count: int = count_nodes(tree)
+        perNode.append(retained / count)
+        print(
+            f"  {name:10} {count:8,} nodes {retained / 2**20:8.1f} MB"
+            f"  {retained / count:6.1f} bytes/node (tokens included)"
+        )
+        del tree
+    print(f"  saving     {perNode[0] - perNode[1]:6.1f} bytes/node")
+    bench_arena(source)
+
+
+def bench_arena(source: str):
+    import pickle
+    import scanner
+    import parse
+    from . import arena
+
+    tree = parse.Parser(scanner.Scanner(source)).parse()
+    tracemalloc.start()
+    flat: arena.Arena = arena.flatten(tree)
+    retained: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(
+        f"  {'arena':10} {len(flat):8,} slots {retained / 2**20:8.1f} MB"
+        f"  {retained / len(flat):6.1f} bytes/slot (token references included)"
+    )
+    flattenTime: float = best_time(lambda: arena.flatten(tree), 1)
+    expandTime: float = best_time(flat.expand, 1)
+    pickled: bytes = pickle.dumps(flat)
+    print(
+        f"  flatten {flattenTime:.3f}s  expand {expandTime:.3f}s"
+        f"  pickled {len(pickled) / 2**20:.1f} MB"
+        f" vs {len(pickle.dumps(tree)) / 2**20:.1f} MB for the tree"
+    )
+
+
+def read_source(args) -> str:
+    if args.file is not None:
+        with open(args.file) as f:
+            return f.read()
+    return generate_program(args.functions, args.statements)
+
+
+def main():
+    args = parse_args()
+    match args.command:
+        case "parse":
+            bench_parse(read_source(args), args.lexer, args.repeat)
+        case "semantics":
+            bench_semantics(read_source(args), args.repeat)
+        case "incremental":
+            bench_incremental(read_source(args), args.repeat)
+        case "memory":
+            bench_memory(read_source(args))
+        case "vm":
+            if args.file is not None:
+                programs: dict[str, str] = {args.file: read_source(args)}
+            else:
+                programs = {
+                    "loop": generate_loop(args.iterations),
+                    "fib": generate_fib(args.fib),
+                    "program": generate_program(args.functions, args.statements),
+                }
+            bench_vm(programs, args.engine, args.repeat, args.fuse)
+        case "deep":
+            bench_deep(generate_nested(args.depth), args.parser, args.repeat)
+        case _:
+            assert False
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Tau compiler")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_source_args(sub: argparse.ArgumentParser):
+        sub.add_argument(
+            "--file", type=str, default=None, help="benchmark this .tau file"
+        )
+        sub.add_argument(
+            "--functions",
+            type=int,
+            default=200,
+            help="functions in the generated program",
+        )
+        sub.add_argument(
+            "--statements",
+            type=int,
+            default=20,
+            help="statement groups per generated function",
+        )
+
+    parse = subparsers.add_parser("parse", help="scanner + parser throughput")
+    add_source_args(parse)
+    parse.add_argument(
+        "--repeat", type=int, default=3, help="report the best of N runs"
+    )
+    parse.add_argument(
+        "--lexer",
+        nargs="+",
+        default=["hand", "regex", "array"],
+        help="lexer engines to compare",
+    )
+
+    semantics = subparsers.add_parser(
+        "semantics", help="bindings + typecheck + offsets, separate and fused"
+    )
+    add_source_args(semantics)
+    semantics.add_argument(
+        "--repeat", type=int, default=3, help="report the best of N runs"
+    )
+
+    incremental = subparsers.add_parser(
+        "incremental", help="recompile after editing one function"
+    )
+    add_source_args(incremental)
+    incremental.add_argument(
+        "--repeat", type=int, default=3, help="report the best of N runs"
+    )
+
+    memory = subparsers.add_parser("memory", help="memory held by the AST")
+    add_source_args(memory)
+
+    vm = subparsers.add_parser("vm", help="run compiled programs on each VM engine")
+    add_source_args(vm)
+    vm.add_argument(
+        "--iterations",
+        type=int,
+        default=30000,
+        help="iterations of the generated loop program",
+    )
+    vm.add_argument(
+        "--fib", type=int, default=18, help="argument of the generated fib program"
+    )
+    vm.add_argument(
+        "--repeat", type=int, default=3, help="report the best of N runs"
+    )
+    vm.add_argument(
+        "--engine",
+        nargs="+",
+        default=["step", "threaded"],
+        help="VM engines to compare; speedups are relative to the first",
+    )
+    vm.add_argument(
+        "--fuse",
+        action="store_true",
+        help="also time each program after superinstruction fusion",
+    )
+
+    deep = subparsers.add_parser("deep", help="parse deeply nested code")
+    deep.add_argument(
+        "--depth", type=int, default=10000, help="levels of nesting"
+    )
+    deep.add_argument(
+        "--repeat", type=int, default=3, help="report the best of N runs"
+    )
+    deep.add_argument(
+        "--parser",
+        nargs="+",
+        default=["recursive", "iterative"],
+        help="parsers to compare",
+    )
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import hashlib
+import importlib.util
+import mmap
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, List, Optional
+
+from .vm import bytecode
+from .vm.vm_insns import Insn
+
+# A content-addressed store of compiled programs: one tau.vm.bytecode file per
+# program, named by the hash of the source and of the compiler that built it,
+# and memory-mapped straight into disassemble() on a hit. Entries are written
+# to a temporary file and renamed into place, so several processes can share
+# a directory: readers only ever see complete files, and an entry that
+# disappears or fails to decode is simply a miss. Hits bump the file's mtime
+# and the least recently used entries are deleted once the directory grows
+# past maxBytes. incremental.Compiler keeps the functions it compiles here
+# too, pickled, under keys built with options="function".
+
+# the modules whose code decides what a source compiles to
+COMPILER_MODULES: list[str] = [
+    "scanner",
+    "parse",
+    "bindings",
+    "typecheck",
+    "offsets",
+    "semantics",
+    "incremental",
+    "fold",
+    "codegen",
+    "tau.asts",
+    "tau.symbols",
+    "tau.tokens",
+    "tau.vm.vm_insns",
+    "tau.vm.bytecode",
+    "tau.cache",
+]
+
+SUFFIX: str = ".tauc"
+# temporary files older than this were left by a writer that died
+STALE_SECONDS: float = 3600
+
+
+def default_dir() -> str:
+    if "TAU_CACHE_DIR" in os.environ:
+        return os.environ["TAU_CACHE_DIR"]
+    base: str = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "tau")
+
+
+_version: Optional[str] = None
+
+
+# a hash of the compiler's own source, found without importing it
+def compiler_version() -> str:
+    global _version
+    if _version is None:
+        h = hashlib.sha256()
+        for name in COMPILER_MODULES:
+            spec = importlib.util.find_spec(name)
+            assert spec is not None and spec.origin is not None, name
+            with open(spec.origin, "rb") as f:
+                h.update(f.read())
+        _version = h.hexdigest()
+    return _version
+
+
+class Cache:
+    def __init__(self, directory: str, maxBytes: int):
+        self.directory: str = directory
+        self.maxBytes: int = maxBytes
+
+    # options names the compiler settings that change the output
+    def key(self, source, options: str = "") -> str:
+        h = hashlib.sha256(compiler_version().encode())
+        h.update(options.encode() + b"\0")
+        h.update(source.encode() if isinstance(source, str) else source)
+        return h.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key: str) -> Optional[List[Insn]]:
+        path: str = self.path(key)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                insns: List[Insn] = bytecode.disassemble(mapped)
+        except Exception:
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return insns
+
+    # a directory that cannot be written to just leaves the program uncached
+    def store(self, key: str, insns: List[Insn]):
+        self.write(key, bytecode.assemble(insns))
+
+    def load_pickle(self, key: str) -> Any:
+        path: str = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                value: Any = pickle.load(f)
+        except OSError:
+            return None
+        except Exception:
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    # a value too deep or too odd to pickle is left uncached
+    def store_pickle(self, key: str, value: Any):
+        try:
+            data: bytes = pickle.dumps(value)
+        except (pickle.PicklingError, RecursionError, TypeError):
+            return
+        self.write(key, data)
+
+    def write(self, key: str, data: bytes):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(
+                dir=self.directory, prefix=".", suffix=".tmp"
+            )
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path(key))
+        except OSError:
+            self.remove(tmp)
+            return
+        self.evict()
+
+    # delete least recently used entries until the cache fits in maxBytes
+    def evict(self):
+        entries: list[tuple[float, int, str]] = []
+        total: int = 0
+        now: float = time.time()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith(SUFFIX):
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+                elif entry.name.endswith(".tmp") and now - stat.st_mtime > STALE_SECONDS:
+                    self.remove(entry.path)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def remove(self, path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
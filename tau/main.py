@@ -1,53 +1,245 @@
 import argparse
+import mmap
+import os
+import sys
 from typing import List
 
 
 def main():
     args = get_args()
     fname = args.file
-    with open(fname) as f:
-        input = f.read()
-    interpret(input, args.args, args.verbose, args.stopafter)
+    if args.mmap:
+        input = map_source(fname)
+    else:
+        with open(fname) as f:
+            input = f.read()
+    cache = None
+    if not args.no_cache and args.stopafter is None:
+        from tau.cache import Cache, default_dir
 
+        cache = Cache(args.cache_dir or default_dir(), args.cache_size * 2**20)
+    interpret(
+        input,
+        args.args,
+        args.verbose,
+        args.stopafter,
+        args.lexer,
+        args.parser,
+        args.slim_ast,
+        args.fused,
+        cache,
+        args.bytecode,
+        args.engine,
+        args.fuse,
+        peephole_passes(args),
+        args.peephole_stats,
+        args.fold,
+        args.incremental,
+    )
+
+
+def map_source(fname):
+    with open(fname, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped.find(b"\r") != -1:
+        # text mode would translate these line endings, so do the same
+        text = mapped[:].decode()
+        mapped.close()
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+    return mapped
+
+
+def interpret(
+    input,
+    args,
+    verbose,
+    stopafter,
+    lexer_engine="hand",
+    parser_engine="recursive",
+    slim_ast=False,
+    fused=False,
+    cache=None,
+    bytecode_file=None,
+    vm_engine="step",
+    fuse=False,
+    peephole=None,
+    peephole_stats=False,
+    fold=False,
+    incremental=False,
+):
+    if cache is not None:
+        options = [name for name, on in (("fold", fold), ("fused", fused)) if on]
+        key = cache.key(input, ",".join(options))
+        insns = cache.load(key)
+        if insns is not None:
+            execute(
+                insns,
+                args,
+                verbose,
+                bytecode_file,
+                vm_engine,
+                fuse,
+                peephole,
+                peephole_stats,
+            )
+            return
+    if incremental:
+        import gc
+        import incremental as recompiler
 
-def interpret(input, args, verbose, stopafter):
+        # functions an earlier run left in the cache are reused; what they
+        # unpickle to lives until exit, so the collector can stop scanning it
+        _, insns = recompiler.Compiler(cache).compile(input)
+        gc.freeze()
+        if cache is not None:
+            cache.store(key, insns)
+        execute(
+            insns,
+            args,
+            verbose,
+            bytecode_file,
+            vm_engine,
+            fuse,
+            peephole,
+            peephole_stats,
+        )
+        return
     import scanner
 
-    lexer = scanner.Scanner(input)
+    lexer = scanner.engines[lexer_engine](input)
     if stopafter == "scanner":
+        # tokens are produced lazily, so drain the stream to report scan errors
+        while lexer.consume().kind != "EOF":
+            pass
         return
     import parse
+    from tau import asts, slim_asts
 
-    psr = parse.Parser(lexer)
+    psr = parse.parsers[parser_engine](lexer, slim_asts if slim_ast else asts)
     tree = psr.parse()
+    if isinstance(psr, parse.RecoveringParser) and psr.diagnostics:
+        for diagnostic in psr.diagnostics:
+            print(diagnostic, file=sys.stderr)
+        sys.exit(1)
     if stopafter == "parser":
         return
-    import bindings
+    from tau import recursion
 
-    bindings.bind(tree)
-    if stopafter == "bindings":
+    # a tree from the iterative parser can be deeper than the passes may
+    # recurse by default
+    with recursion.limit(psr.recursion_limit()):
+        insns = compile_tree(tree, stopafter, fused, fold)
+    if insns is None:
         return
-    import typecheck
+    if cache is not None:
+        cache.store(key, insns)
+    execute(
+        insns,
+        args,
+        verbose,
+        bytecode_file,
+        vm_engine,
+        fuse,
+        peephole,
+        peephole_stats,
+    )
 
-    typecheck.program(tree)
-    if stopafter == "typecheck":
-        return
-    import offsets
 
-    offsets.program(tree)
-    if stopafter == "offsets":
-        return
+# the passes after parsing; returns the generated code, or None after
+# stopafter
+def compile_tree(tree, stopafter, fused, fold):
+    if fused:
+        import semantics
+
+        # bindings, typecheck and offsets in one walk
+        semantics.program(tree)
+        if stopafter in ("bindings", "typecheck", "offsets"):
+            return None
+        if fold:
+            import fold as folding
+            import offsets
+
+            # frames are laid out again, so pruned blocks take no space here
+            # either
+            folding.program(tree)
+            offsets.program(tree)
+    else:
+        import bindings
+
+        bindings.bind(tree)
+        if stopafter == "bindings":
+            return None
+        import typecheck
+
+        typecheck.program(tree)
+        if stopafter == "typecheck":
+            return None
+        if fold:
+            import fold as folding
+
+            # before offsets, so pruned blocks take no frame space
+            folding.program(tree)
+        import offsets
+
+        offsets.program(tree)
+        if stopafter == "offsets":
+            return None
     import codegen
 
-    insns = codegen.generate(tree)
+    return codegen.generate(tree)
+
+
+# run the compiled program, or save it as bytecode if bytecode_file is given;
+# the peephole passes run and superinstructions are fused here, so cached
+# builds are the same whichever are enabled
+def execute(
+    insns,
+    args,
+    verbose,
+    bytecode_file=None,
+    vm_engine="step",
+    fuse=False,
+    peephole=None,
+    peephole_stats=False,
+):
+    if peephole is not None:
+        from tau.vm import peephole as optimizer
+
+        stats: dict[str, int] = {}
+        before: int = len(insns)
+        insns = optimizer.optimize(insns, peephole, stats)
+        if peephole_stats:
+            print(optimizer.report(stats, before, len(insns)), file=sys.stderr)
+    if fuse:
+        from tau.vm import fuse as superinsns
+
+        insns = superinsns.fuse(insns)
+    if bytecode_file is not None:
+        from tau.vm import bytecode
+
+        bytecode.write(bytecode_file, insns)
+        return
     from tau.vm import vm_utils
 
     if verbose:
         vm_utils.dump_insns(insns)
-    vm_utils.invoke_vm(insns, args, verbose)
+    vm_utils.invoke_vm(insns, args, verbose, vm_engine)
+
+
+# the peephole passes to run, or None if the optimizer is off
+def peephole_passes(args):
+    if not args.peephole:
+        return None
+    from tau.vm.peephole import PASSES
+
+    return [name for name in PASSES if name not in args.peephole_skip]
 
 
 def get_args():
+    from tau.vm.peephole import PASSES
+
     ap: argparse.ArgumentParser = argparse.ArgumentParser(
         description="Compile Tau files"
     )
@@ -58,10 +250,99 @@ def get_args():
         help="Cause the interpreter to be more verbose",
     )
     ap.add_argument("--stopafter", type=str, help="Stop after a certain phase")
+    ap.add_argument(
+        "--lexer",
+        choices=["hand", "regex", "array"],
+        default="hand",
+        help="Lexer engine to scan with",
+    )
+    ap.add_argument(
+        "--parser",
+        choices=["recursive", "iterative", "recovering"],
+        default="recursive",
+        help="Parser to build the AST with",
+    )
+    ap.add_argument(
+        "--engine",
+        choices=["step", "threaded"],
+        default="step",
+        help="VM engine to run the program with",
+    )
+    ap.add_argument(
+        "--fuse",
+        action="store_true",
+        help="Fuse common instruction sequences into superinstructions before running",
+    )
+    ap.add_argument(
+        "--peephole",
+        action="store_true",
+        help="Run the peephole optimizer over the generated code",
+    )
+    ap.add_argument(
+        "--peephole-skip",
+        nargs="+",
+        default=[],
+        choices=list(PASSES),
+        help="Peephole passes to leave out",
+    )
+    ap.add_argument(
+        "--peephole-stats",
+        action="store_true",
+        help="Report what each peephole pass changed on stderr",
+    )
+    ap.add_argument(
+        "--fold",
+        action="store_true",
+        help="Fold constant expressions and prune constant branches after typechecking",
+    )
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Compile function by function, reusing the functions earlier runs cached",
+    )
+    ap.add_argument(
+        "--slim-ast",
+        action="store_true",
+        help="Build the AST from slotted tau.slim_asts nodes to save memory",
+    )
+    ap.add_argument(
+        "--fused",
+        action="store_true",
+        help="Resolve, typecheck and lay out frames in a single pass",
+    )
+    ap.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Memory-map the source file and lex it as bytes",
+    )
+    ap.add_argument(
+        "--bytecode",
+        default=None,
+        help="Write the compiled program to this file for tau.vm.vmcmd instead of running it",
+    )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always compile instead of reusing a cached build",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Where compiled programs are cached (default $TAU_CACHE_DIR or ~/.cache/tau)",
+    )
+    ap.add_argument(
+        "--cache-size",
+        type=int,
+        default=64,
+        help="Megabytes the cache may hold before old builds are evicted",
+    )
     ap.add_argument(
         "args", nargs="*", help="Arguments to pass to the program as integers"
     )
-    return ap.parse_args()
+    args = ap.parse_args()
+    if args.incremental and (args.stopafter or args.fold):
+        ap.error("--incremental cannot be combined with --stopafter or --fold")
+    return args
 
 
 if __name__ == "__main__":
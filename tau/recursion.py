@@ -0,0 +1,19 @@
+import contextlib
+import sys
+from typing import Iterator
+
+# The recursive passes walk the tree on the Python call stack, so a tree from
+# parse.IterativeParser can need a higher recursion limit than the default.
+# limit() raises it for the duration of a with block and puts the previous
+# limit back afterwards, so callers of the compiler keep their own.
+
+
+@contextlib.contextmanager
+def limit(frames: int) -> Iterator[None]:
+    previous: int = sys.getrecursionlimit()
+    if frames > previous:
+        sys.setrecursionlimit(frames)
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(previous)
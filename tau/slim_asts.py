@@ -0,0 +1,336 @@
+from typing import Optional
+
+from . import asts
+from .tokens import Token, Span
+from .symbols import (
+    Symbol,
+    PhonySymbol,
+    SemanticType,
+    PhonyType,
+    Scope,
+    PhonyScope,
+)
+
+# Memory-lean stand-ins for the tau.asts node classes, built by
+# parse.Parser(lexer, slim_asts). Fields live in __slots__ instead of a
+# per-instance __dict__, and unresolved symbols, types and scopes all point at
+# the shared placeholders below instead of fresh Phony objects.
+#
+# Each class reports its tau.asts counterpart as __class__, so `match` and
+# isinstance() in the compiler passes, tau.compare and the testers treat these
+# nodes as the tau.asts ones; the passes also name a node by its __class__ in
+# error messages, so those read the same for both trees. A node pickles (and
+# deep-copies) as that tau.asts node, so a slim tree unpickles as an ordinary
+# one.
+
+PHONY_SYMBOL: Symbol = PhonySymbol()
+PHONY_TYPE: SemanticType = PhonyType()
+PHONY_SCOPE: Scope = PhonyScope()
+
+
+class AST:
+    __slots__ = ("span",)
+    span: Span
+    # the tau.asts class this node stands in for
+    base: type = asts.AST
+
+    @property
+    def __class__(self):
+        return self.base
+
+    def pprint(self, indent: str):
+        self.base.pprint(self, indent)
+
+    def __repr__(self) -> str:
+        return self.base.__repr__(self)
+
+    def __reduce__(self):
+        fields: dict = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(self, name):
+                    fields[name] = getattr(self, name)
+        return rebuild, (self.base, fields)
+
+
+def rebuild(base: type, fields: dict) -> asts.AST:
+    node = base.__new__(base)
+    node.__dict__.update(fields)
+    return node
+
+
+class Program(AST):
+    __slots__ = ("decls",)
+    base = asts.Program
+
+    def __init__(self, decls: list["FuncDecl"], span: Span):
+        self.decls: list["FuncDecl"] = decls
+        self.span: Span = span
+
+
+class Id(AST):
+    __slots__ = ("token", "symbol", "semantic_type")
+    base = asts.Id
+
+    def __init__(self, token: Token):
+        self.token = token
+        self.symbol: Symbol = PHONY_SYMBOL
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = token.span
+
+
+class TypeAST(AST):
+    __slots__ = ("semantic_type",)
+    base = asts.TypeAST
+
+    def __init__(self):
+        self.semantic_type: SemanticType = PHONY_TYPE
+
+
+class Decl(AST):
+    __slots__ = ("id", "type_ast", "semantic_type")
+    base = asts.Decl
+
+    def __init__(self, id: Id, type: TypeAST, span: Span):
+        self.id = id
+        self.type_ast: TypeAST = type
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = span
+
+
+class VarDecl(Decl):
+    __slots__ = ()
+    base = asts.VarDecl
+
+
+class ParamDecl(Decl):
+    __slots__ = ()
+    base = asts.ParamDecl
+
+
+class IntType(TypeAST):
+    __slots__ = ("token",)
+    base = asts.IntType
+
+    def __init__(self, token: Token):
+        self.token: Token = token
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = token.span
+
+
+class BoolType(TypeAST):
+    __slots__ = ("token",)
+    base = asts.BoolType
+
+    def __init__(self, token: Token):
+        self.token: Token = token
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = token.span
+
+
+class VoidType(TypeAST):
+    __slots__ = ("token",)
+    base = asts.VoidType
+
+    def __init__(self, token: Token):
+        self.token: Token = token
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = token.span
+
+
+class ArrayType(TypeAST):
+    __slots__ = ("size", "element_type_ast")
+    base = asts.ArrayType
+
+    def __init__(self, size: Optional["Expr"], type: TypeAST, span: Span):
+        self.size: Optional["Expr"] = size
+        self.element_type_ast: TypeAST = type
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = span
+
+
+class Stmt(AST):
+    __slots__ = ()
+    base = asts.Stmt
+
+
+class PrintStmt(Stmt):
+    __slots__ = ("expr",)
+    base = asts.PrintStmt
+
+    def __init__(self, expr: "Expr", span: Span):
+        self.expr: Expr = expr
+        self.span: Span = span
+
+
+class CompoundStmt(Stmt):
+    __slots__ = ("decls", "stmts", "local_scope")
+    base = asts.CompoundStmt
+
+    def __init__(
+        self,
+        decls: list[VarDecl],
+        stmts: list[Stmt],
+        span: Span,
+    ):
+        self.decls: list[VarDecl] = decls
+        self.stmts: list[Stmt] = stmts
+        self.local_scope: Scope = PHONY_SCOPE
+        self.span: Span = span
+
+
+class FuncDecl(AST):
+    __slots__ = ("id", "params", "ret_type_ast", "body", "func_scope", "size")
+    base = asts.FuncDecl
+
+    def __init__(
+        self,
+        id: Id,
+        params: list[ParamDecl],
+        ret_type_ast: TypeAST,
+        body: CompoundStmt,
+        span: Span,
+    ):
+        self.id = id
+        self.params: list[ParamDecl] = params
+        self.ret_type_ast: TypeAST = ret_type_ast
+        self.body: CompoundStmt = body
+        self.func_scope: Scope = PHONY_SCOPE
+        self.span: Span = span
+
+
+class Expr(AST):
+    __slots__ = ("semantic_type",)
+    base = asts.Expr
+
+
+class CallExpr(Expr):
+    __slots__ = ("fn", "args")
+    base = asts.CallExpr
+
+    def __init__(self, fn: Expr, args: list[Expr], span: Span):
+        self.fn: Expr = fn
+        self.args: list[Expr] = args
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = span
+
+
+class AssignStmt(Stmt):
+    __slots__ = ("lhs", "rhs")
+    base = asts.AssignStmt
+
+    def __init__(self, lhs: Expr, rhs: Expr, span: Span):
+        self.lhs: Expr = lhs
+        self.rhs: Expr = rhs
+        self.span: Span = span
+
+
+class IfStmt(Stmt):
+    __slots__ = ("expr", "thenStmt", "elseStmt")
+    base = asts.IfStmt
+
+    def __init__(
+        self,
+        expr: Expr,
+        thenStmt: CompoundStmt,
+        elseStmt: Optional[CompoundStmt],
+        span: Span,
+    ):
+        self.expr: Expr = expr
+        self.thenStmt: CompoundStmt = thenStmt
+        self.elseStmt: Optional[CompoundStmt] = elseStmt
+        self.span: Span = span
+
+
+class WhileStmt(Stmt):
+    __slots__ = ("expr", "stmt")
+    base = asts.WhileStmt
+
+    def __init__(self, expr: Expr, stmt: CompoundStmt, span: Span):
+        self.expr: Expr = expr
+        self.stmt: CompoundStmt = stmt
+        self.span: Span = span
+
+
+class CallStmt(Stmt):
+    __slots__ = ("call",)
+    base = asts.CallStmt
+
+    def __init__(self, call: CallExpr, span: Span):
+        self.call: CallExpr = call
+        self.span: Span = span
+
+
+class ReturnStmt(Stmt):
+    __slots__ = ("expr", "enclosing_scope")
+    base = asts.ReturnStmt
+
+    def __init__(self, expr: Optional[Expr], span: Span):
+        self.expr: Optional[Expr] = expr
+        self.span: Span = span
+        self.enclosing_scope: Scope = PHONY_SCOPE
+
+
+class BinaryOp(Expr):
+    __slots__ = ("op", "left", "right")
+    base = asts.BinaryOp
+
+    def __init__(self, op: Token, left: Expr, right: Expr, span: Span):
+        self.op: Token = op
+        self.left: Expr = left
+        self.right: Expr = right
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = span
+
+
+class UnaryOp(Expr):
+    __slots__ = ("op", "expr")
+    base = asts.UnaryOp
+
+    def __init__(self, op: Token, expr: Expr, span: Span):
+        self.op: Token = op
+        self.expr: Expr = expr
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = span
+
+
+class ArrayCell(Expr):
+    __slots__ = ("arr", "idx")
+    base = asts.ArrayCell
+
+    def __init__(self, arr: Expr, idx: Expr, span: Span):
+        self.arr: Expr = arr
+        self.idx: Expr = idx
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span = span
+
+
+class IntLiteral(Expr):
+    __slots__ = ("token",)
+    base = asts.IntLiteral
+
+    def __init__(self, token: Token, span: Span):
+        self.token: Token = token
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = span
+
+
+class BoolLiteral(Expr):
+    __slots__ = ("token", "value")
+    base = asts.BoolLiteral
+
+    def __init__(self, token: Token, value: bool, span: Span):
+        self.token: Token = token
+        self.value: bool = value
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span: Span = span
+
+
+class IdExpr(Expr):
+    __slots__ = ("id",)
+    base = asts.IdExpr
+
+    def __init__(self, id: Id, span: Span):
+        self.id = id
+        self.semantic_type: SemanticType = PHONY_TYPE
+        self.span = span
@@ -10,30 +10,37 @@ class SemanticType:
         assert False, f"{type(self)}.size() not implemented"
 
 
-class VoidType(SemanticType):
-    def size(self) -> int:
-        return 0
+# Types without parameters have a single instance: constructing or unpickling
+# one hands back the same object every time
+class AtomicType(SemanticType):
+    def __new__(cls):
+        if "_instance" not in cls.__dict__:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __eq__(self, other: SemanticType) -> bool:
-        return isinstance(other, VoidType)
+        return isinstance(other, type(self))
 
+    def __hash__(self) -> int:
+        return hash(type(self))
 
-class IntType(SemanticType):
-    def __eq__(self, other: SemanticType) -> bool:
-        return isinstance(other, IntType)
 
+class VoidType(AtomicType):
     def size(self) -> int:
-        return 1
+        return 0
 
 
-class BoolType(SemanticType):
-    def __eq__(self, other: SemanticType) -> bool:
-        return isinstance(other, BoolType)
+class IntType(AtomicType):
+    def size(self) -> int:
+        return 1
+
 
+class BoolType(AtomicType):
     def size(self) -> int:
         return 1
 
 
+# build with array_type() to get the shared instance
 class ArrayType(SemanticType):
     def __init__(self, element_type: SemanticType):
         self.element_type: SemanticType = element_type
@@ -43,12 +50,18 @@ class ArrayType(SemanticType):
             return self.element_type == other.element_type
         return False
 
+    def __hash__(self) -> int:
+        return hash((ArrayType, self.element_type))
 
-class PhonyType(SemanticType):
-    def __eq__(self, other: SemanticType) -> bool:
-        return isinstance(other, PhonyType)
+    def __reduce__(self):
+        return (array_type, (self.element_type,))
+
+
+class PhonyType(AtomicType):
+    pass
 
 
+# build with func_type() to get the shared instance
 class FuncType(SemanticType):
     def __init__(self, params, ret: SemanticType):
         self.params: list[SemanticType] = params
@@ -63,12 +76,49 @@ class FuncType(SemanticType):
             and self.ret == other.ret
         )
 
+    def __hash__(self) -> int:
+        return hash((FuncType, tuple(self.params), self.ret))
 
+    def __reduce__(self):
+        return (func_type, (self.params, self.ret))
+
+
+# The passes build every type from these and the two factories below, so
+# equal types are the same object and can be compared with `is`
+INT: SemanticType = IntType()
+BOOL: SemanticType = BoolType()
+VOID: SemanticType = VoidType()
+PHONY: SemanticType = PhonyType()
+
+_arrayTypes: dict[SemanticType, ArrayType] = {}
+_funcTypes: dict[tuple, FuncType] = {}
+
+
+def array_type(element_type: SemanticType) -> ArrayType:
+    t: Optional[ArrayType] = _arrayTypes.get(element_type)
+    if t is None:
+        t = _arrayTypes[element_type] = ArrayType(element_type)
+    return t
+
+
+def func_type(params: list[SemanticType], ret: SemanticType) -> FuncType:
+    key: tuple = (tuple(params), ret)
+    t: Optional[FuncType] = _funcTypes.get(key)
+    if t is None:
+        t = _funcTypes[key] = FuncType(list(params), ret)
+    return t
+
+
+# Symbols and scopes compare and hash by identity, so they are cheap dict and
+# set keys for the passes
 class Symbol:
     offset: int = 0
 
     def __eq__(self, other: "Symbol") -> bool:
-        assert False, f"not implemented for {type(self)}"
+        return self is other
+
+    def __hash__(self) -> int:
+        return id(self)
 
     def set_type(self, t: SemanticType) -> None:
         assert False, f"not implemented for {type(self)}"
@@ -89,15 +139,6 @@ class IdSymbol(Symbol):
     def get_type(self) -> SemanticType:
         return self._semantic_type
 
-    def __eq__(self, other: "Symbol") -> bool:
-        return (
-            isinstance(other, IdSymbol)
-            and self.name == other.name
-            # and self.semantic_type == other.semantic_type
-            and self.scope.depth() == other.scope.depth()
-            # and self.scope == other.scope # not checked to avoid infinite recursion
-        )
-
     def __repr__(self):
         return "Symbol(%r, %r)" % (self.name, self._semantic_type)
 
@@ -109,13 +150,22 @@ class PhonySymbol(Symbol):
     def __eq__(self, other: "Symbol") -> bool:
         return isinstance(other, PhonySymbol)
 
+    def __hash__(self) -> int:
+        return hash(PhonySymbol)
+
 
 class Scope:
     symtab: dict[str, Symbol]
     parent: Optional["Scope"]
     span: Span
+    # the SymbolTable this scope is open in, if any
+    table: Optional["SymbolTable"] = None
+    # recorded when the scope is built
+    _depth: Optional[int] = None
 
     def lookup(self, name: str) -> Symbol | None:
+        if self.table is not None and self.table.scopes[-1] is self:
+            return self.table.lookup(name)
         if name in self.symtab:
             return self.symtab[name]
         if self.parent:
@@ -123,12 +173,16 @@ class Scope:
         return None
 
     def __eq__(self, other: "Scope") -> bool:
-        assert False, f"not implemented for {type(self)}"
+        return self is other
+
+    def __hash__(self) -> int:
+        return id(self)
 
     def depth(self) -> int:
-        if self.parent:
-            return self.parent.depth() + 1
-        return 0
+        # scopes unpickled from older trees have no recorded depth
+        if self._depth is None:
+            self._depth = self.parent.depth() + 1 if self.parent else 0
+        return self._depth
 
 
 # holds parameters
@@ -137,13 +191,7 @@ class FuncScope(Scope):
         self.symtab = {}
         self.parent = parent
         self.span = span
-
-    def __eq__(self, other: Scope) -> bool:
-        return (
-            isinstance(other, FuncScope)
-            and self.symtab == other.symtab
-            and self.parent == other.parent
-        )
+        self._depth = parent.depth() + 1 if parent else 0
 
 
 # holds symbols in compound statement
@@ -152,13 +200,7 @@ class LocalScope(Scope):
         self.parent: Scope = parent
         self.span: Span = span
         self.symtab: dict[str, Symbol] = {}
-
-    def __eq__(self, other: Scope) -> bool:
-        return (
-            isinstance(other, LocalScope)
-            and self.symtab == other.symtab
-            and self.parent == other.parent
-        )
+        self._depth = parent.depth() + 1 if parent else 0
 
 
 # holds global symbols (i.e., function declarations)
@@ -167,15 +209,56 @@ class GlobalScope(Scope):
         self.span: Span = span
         self.symtab: dict[str, Symbol] = {}
         self.parent = None
-
-    def __eq__(self, other: Scope) -> bool:
-        return isinstance(other, GlobalScope) and self.symtab == other.symtab
+        self._depth = 0
 
 
 class PhonyScope(Scope):
     def __init__(self):
         self.symtab: dict[str, Symbol] = {}
         self.parent = None
+        self._depth = 0
 
     def __eq__(self, other: Scope) -> bool:
-        return isinstance(other, PhonyScope) and self.symtab == other.symtab
+        return isinstance(other, PhonyScope)
+
+    def __hash__(self) -> int:
+        return hash(PhonyScope)
+
+
+# Every name visible from the innermost open scope, found with one dict probe:
+# names maps each name to the stack of its declarations, innermost last.
+# Opening a scope pushes its symbols and closing it pops them again, so
+# lookups cost the same however deeply the scopes are nested.
+class SymbolTable:
+    def __init__(self):
+        self.names: dict[str, list[Symbol]] = {}
+        self.scopes: list[Scope] = []
+
+    def open(self, scope: Scope):
+        scope.table = self
+        self.scopes.append(scope)
+        for name, symbol in scope.symtab.items():
+            self.names.setdefault(name, []).append(symbol)
+
+    def close(self):
+        scope: Scope = self.scopes.pop()
+        scope.table = None
+        for name in scope.symtab:
+            stack: list[Symbol] = self.names[name]
+            stack.pop()
+            if not stack:
+                del self.names[name]
+
+    # add name to the innermost open scope, replacing an earlier declaration
+    # of the same name there
+    def declare(self, name: str, symbol: Symbol):
+        scope: Scope = self.scopes[-1]
+        if name in scope.symtab:
+            self.names[name][-1] = symbol
+        else:
+            self.names.setdefault(name, []).append(symbol)
+        scope.symtab[name] = symbol
+
+    def lookup(self, name: str) -> Symbol | None:
+        stack: Optional[list[Symbol]] = self.names.get(name)
+        return stack[-1] if stack else None
@@ -9,6 +9,7 @@ import sys
 from typing import Callable, Tuple, Any, Optional, Dict, NamedTuple, List
 
 from .testers import *
+from .recursion import limit
 
 
 class TestResult(NamedTuple):
@@ -82,14 +83,16 @@ def run_test(
 
 
 def evaluate_test(
-    test: Dict, verbose: bool, crash: bool
+    test: Dict, verbose: bool, crash: bool, function: Optional[str] = None
 ) -> Tuple[bool, TestResult]:
     compare = get_function(test["compare"])
     result: TestResult = run_test(
-        test["input"], test["function"], verbose, crash
+        test["input"], function or test["function"], verbose, crash
     )
     try:
-        res = compare(result.retval, test["output"], crash)
+        # trees too deep for the default limit record the one they need
+        with limit(test.get("recursion_limit") or 0):
+            res = compare(result.retval, test["output"], crash)
     except Exception as e:
         if crash:
             raise
@@ -111,6 +114,7 @@ def run(
     crash: bool,
     allOrNothing=None,
     name=None,
+    function=None,
 ) -> Dict:
     if verbose:
         print("Running tests")
@@ -134,7 +138,7 @@ def run(
                 pprint.pprint(test)
             passed: bool
             result: TestResult
-            passed, result = evaluate_test(test, verbose, crash)
+            passed, result = evaluate_test(test, verbose, crash, function)
             if verbose:
                 print(f"passed: {passed}")
                 print_result(result)
@@ -168,7 +172,7 @@ def do_gradescope(filenames: List[str], outfile: str, allOrNothing=None):
 
 
 def process_test_inputs(
-    compare_name, fn_name, file_name, input: Any, verbose
+    compare_name, fn_name, file_name, input: Any, verbose, recursion_limit=None
 ) -> Dict:
     result = run_test(input, fn_name, verbose, False)
     test = {
@@ -180,6 +184,7 @@ def process_test_inputs(
         "stdout": result.out.getvalue(),
         "stderr": result.err.getvalue(),
         "error": result.exc,
+        "recursion_limit": recursion_limit,
     }
     return test
 
@@ -212,12 +217,14 @@ def create(args):
                 fname,
                 input,
                 args.verbose,
+                args.recursion_limit,
             )
             outputs.append(output)
     if args.verbose:
         print(f"Writing output.  {len(outputs)} tests")
     with open(args.output, "wb") as f:
-        pickle.dump(outputs, f)
+        with limit(args.recursion_limit or 0):
+            pickle.dump(outputs, f)
 
 
 def main():
@@ -232,6 +239,7 @@ def main():
                 args.crash,
                 None,
                 args.name,
+                args.function,
             )
             pprint.pprint(results, indent=4, sort_dicts=False)
         case _:
@@ -256,6 +264,12 @@ def parse_args():
     create.add_argument(
         "--verbose", action="store_true", help="verbose output"
     )
+    create.add_argument(
+        "--recursion-limit",
+        type=int,
+        default=None,
+        help="recursion limit to pickle and compare the outputs under",
+    )
 
     format = create.add_mutually_exclusive_group(required=True)
     format.add_argument(
@@ -275,6 +289,12 @@ def parse_args():
     run.add_argument(
         "--name", type=str, default=None, help="limit to a specific test"
     )
+    run.add_argument(
+        "--function",
+        type=str,
+        default=None,
+        help="run the tests against this function instead of the recorded one",
+    )
 
     return parser.parse_args()
 
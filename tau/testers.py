@@ -20,6 +20,24 @@ def run_scanner(input: str) -> List[Token]:
     from scanner import Scanner
 
     lexer: Scanner = Scanner(input)
+    return drain_scanner(lexer)
+
+
+def run_scanner_regex(input: str) -> List[Token]:
+    from scanner import RegexScanner
+
+    lexer: RegexScanner = RegexScanner(input)
+    return drain_scanner(lexer)
+
+
+def run_scanner_array(input: str) -> List[Token]:
+    from scanner import ArrayScanner
+
+    lexer: ArrayScanner = ArrayScanner(input)
+    return drain_scanner(lexer)
+
+
+def drain_scanner(lexer: Any) -> List[Token]:
     tokens: List[Token] = []
     while lexer.peek().kind != "EOF":
         tokens.append(lexer.peek())
@@ -254,6 +272,66 @@ def run_ast(input: str) -> Any:
     return tree
 
 
+def run_ast_iterative(input: str) -> Any:
+    from scanner import Scanner
+
+    lexer: Scanner = Scanner(input)
+    from parse import IterativeParser
+    from .asts import Program
+
+    psr: IterativeParser = IterativeParser(lexer)
+    tree: Program = psr.parse()
+    return tree
+
+
+def run_ast_recovering(input: str) -> Any:
+    from scanner import Scanner
+
+    lexer: Scanner = Scanner(input)
+    from parse import RecoveringParser
+    from .asts import Program
+
+    psr: RecoveringParser = RecoveringParser(lexer)
+    tree: Program = psr.parse()
+    if psr.diagnostics:
+        raise psr.diagnostics[0]
+    return tree
+
+
+# every diagnostic RecoveringParser reports, and where it resumed after each
+def run_recovering_diagnostics(input: str) -> Any:
+    from scanner import Scanner
+    from parse import RecoveringParser
+
+    psr: RecoveringParser = RecoveringParser(Scanner(input))
+    psr.parse()
+    return {
+        "diagnostics": [str(diagnostic) for diagnostic in psr.diagnostics],
+        "resumed": [str(coord) for coord in psr.resumed],
+    }
+
+
+def run_ast_slim(input: str) -> Any:
+    from scanner import Scanner
+
+    lexer: Scanner = Scanner(input)
+    from parse import Parser
+    from . import slim_asts
+    from .asts import Program
+
+    psr: Parser = Parser(lexer, slim_asts)
+    tree: Program = psr.parse()
+    return tree
+
+
+def run_ast_arena(input: str) -> Any:
+    import pickle
+    from .arena import Arena, flatten
+
+    shipped: Arena = pickle.loads(pickle.dumps(flatten(run_ast(input))))
+    return shipped.expand()
+
+
 def run_binding(input: str):
     tree = run_ast(input)
     import bindings
@@ -278,6 +356,14 @@ def run_offsets(input: str):
     return tree
 
 
+def run_semantics(input: str):
+    tree = run_ast(input)
+    import semantics
+
+    semantics.program(tree)
+    return tree
+
+
 def run_codegen(input: str):
     tree = run_offsets(input)
     import codegen
@@ -290,6 +376,132 @@ def run_codegen(input: str):
     return tree
 
 
+def run_codegen_threaded(input: str):
+    tree = run_offsets(input)
+    import codegen
+    from tau.vm import vm_utils
+
+    vm_utils.invoke_vm(codegen.generate(tree), [], False, engine="threaded")
+    return tree
+
+
+def run_codegen_fused_insns(input: str):
+    tree = run_offsets(input)
+    import codegen
+    from tau.vm import vm_utils, fuse
+
+    vm_utils.invoke_vm(fuse.fuse(codegen.generate(tree)), [], False)
+    return tree
+
+
+def run_codegen_peephole(input: str):
+    tree = run_offsets(input)
+    import codegen
+    from tau.vm import vm_utils, fuse, peephole
+
+    insns = fuse.fuse(peephole.optimize(codegen.generate(tree)))
+    vm_utils.invoke_vm(insns, [], False)
+    return tree
+
+
+# runs the program once per peephole pass, with that pass left out; every run
+# must print the same, and that is printed once
+def run_codegen_peephole_skipping(input: str):
+    import contextlib
+    import io
+
+    tree = run_offsets(input)
+    import codegen
+    from tau.vm import vm_utils, peephole
+
+    insns = codegen.generate(tree)
+    outputs: List[str] = []
+    for skipped in peephole.PASSES:
+        passes: List[str] = [name for name in peephole.PASSES if name != skipped]
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            vm_utils.invoke_vm(peephole.optimize(insns, passes), [], False)
+        outputs.append(out.getvalue())
+        assert outputs[-1] == outputs[0], f"output changes without {skipped}"
+    print(outputs[0], end="")
+    return tree
+
+
+# folds constants between typecheck and offsets, as tau.main --fold does;
+# pruned blocks take no frame space, so the offsets and frame sizes differ
+# from run_codegen's and are checked against their own pickle
+def run_codegen_fold(input: str):
+    tree = run_typecheck(input)
+    import fold
+    import offsets
+    import codegen
+    from tau.vm import vm_utils
+
+    fold.program(tree)
+    offsets.program(tree)
+    vm_utils.invoke_vm(codegen.generate(tree), [], False)
+    return tree
+
+
+# the same after the fused pass, as tau.main --fused --fold does;
+# test_codegen does not compare frame sizes, so they are checked against
+# the separate passes' here
+def run_codegen_fused_fold(input: str):
+    tree = run_ast(input)
+    separate = run_typecheck(input)
+    import semantics
+    import fold
+    import offsets
+    import codegen
+    from tau.vm import vm_utils
+
+    semantics.program(tree)
+    fold.program(tree)
+    offsets.program(tree)
+    fold.program(separate)
+    offsets.program(separate)
+    for fused, expected in zip(tree.decls, separate.decls):
+        assert fused.size == expected.size, f"{fused.size} != {expected.size}"
+    vm_utils.invoke_vm(codegen.generate(tree), [], False)
+    return tree
+
+
+# parses with the explicit-stack parser, then compiles and runs the program
+# under the recursion limit the parser asks for
+def run_codegen_iterative(input: str):
+    from scanner import Scanner
+    from parse import IterativeParser
+    from .recursion import limit
+    import bindings
+    import typecheck
+    import offsets
+    import codegen
+    from tau.vm import vm_utils
+
+    psr: IterativeParser = IterativeParser(Scanner(input))
+    tree = psr.parse()
+    with limit(psr.recursion_limit()):
+        bindings.bind(tree)
+        typecheck.program(tree)
+        offsets.program(tree)
+        insns = codegen.generate(tree)
+    vm_utils.invoke_vm(insns, [], False)
+    return tree
+
+
+# compiles twice with one incremental.Compiler, so the program that runs is
+# built entirely from the functions cached by the first compile
+def run_incremental(input: str):
+    import incremental
+    from tau.vm import vm_utils
+
+    compiler = incremental.Compiler()
+    compiler.compile(input)
+    tree, insns = compiler.compile(input)
+    vm_utils.invoke_vm(insns, [], False)
+    return tree
+
+
 def run_errors(input: str):
     try:
         tree = run_ast(input)
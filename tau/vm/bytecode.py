@@ -0,0 +1,201 @@
+import mmap
+import struct
+from typing import List, Union
+
+from .vm_insns import *
+
+# A compiled program as binary bytecode:
+#
+#   header    magic, format version, instruction count, constant count
+#   code      one fixed-width record per instruction: opcode byte, 32-bit
+#             operand, 32-bit constant index of the comment (-1 for none)
+#   constants the label names, comments and out-of-range integers, each a
+#             kind byte, a 32-bit length and the UTF-8 text
+#
+# Jumps and PushLabel carry the PC of their Label, so the labels are resolved
+# when the program is written; a Label's own operand is the constant holding
+# its name, which is kept so that dumps and error messages read the same as
+# the assembly. A PushImmediate whose value does not fit in 32 bits has
+# POOLED set in its opcode and the value in the constant pool, and so does an
+# AddImmediate. A CompareAndBranch packs its comparison into the low
+# COMPARE_BITS of the operand, above which is the PC of its label.
+
+MAGIC: bytes = b"TAUB"
+VERSION: int = 1
+HEADER: struct.Struct = struct.Struct("<4sHII")
+RECORD: struct.Struct = struct.Struct("<Bii")
+LENGTH: struct.Struct = struct.Struct("<I")
+POOLED: int = 0x80
+NO_COMMENT: int = -1
+
+# the opcode of each instruction is its index here; append only
+OPCODES: list[type] = [
+    Label,
+    Jump,
+    JumpIfZero,
+    JumpIfNotZero,
+    JumpIndirect,
+    PushImmediate,
+    PushLabel,
+    Add,
+    Sub,
+    Mul,
+    Div,
+    Negate,
+    LessThan,
+    GreaterThan,
+    LessThanEqual,
+    GreaterThanEqual,
+    Equal,
+    NotEqual,
+    Not,
+    Load,
+    Store,
+    Print,
+    PushFP,
+    PopFP,
+    PushSP,
+    PopSP,
+    Call,
+    Halt,
+    Pop,
+    Swap,
+    SaveEvalStack,
+    RestoreEvalStack,
+    Noop,
+    LoadLocal,
+    StoreLocal,
+    AddImmediate,
+    CompareAndBranch,
+]
+OPCODE_IDS: dict[type, int] = {cls: i for i, cls in enumerate(OPCODES)}
+# instructions whose operand is the PC of a label
+BRANCHES: tuple[type, ...] = (
+    Jump,
+    JumpIfZero,
+    JumpIfNotZero,
+    PushLabel,
+    CompareAndBranch,
+)
+COMPARES: list[str] = ["lt", "gt", "leq", "geq", "eq", "neq"]
+COMPARE_BITS: int = 3
+
+INT_MIN: int = -(2**31)
+INT_MAX: int = 2**31 - 1
+
+
+def assemble(insns: List[Insn]) -> bytes:
+    labels: dict[str, int] = {}
+    for pc, insn in enumerate(insns):
+        if isinstance(insn, Label):
+            labels.setdefault(insn.label, pc)
+    constants: list[Union[str, int]] = []
+    constantIds: dict[tuple[type, Union[str, int]], int] = {}
+
+    def constant(value: Union[str, int]) -> int:
+        key = (type(value), value)
+        if key not in constantIds:
+            constantIds[key] = len(constants)
+            constants.append(value)
+        return constantIds[key]
+
+    code: bytearray = bytearray()
+    for insn in insns:
+        opcode: int = OPCODE_IDS[type(insn)]
+        operand: int = 0
+        match insn:
+            case Label():
+                operand = constant(insn.label)
+            case Jump() | JumpIfZero() | JumpIfNotZero() | PushLabel():
+                if insn.label not in labels:
+                    raise ValueError(f"Undefined label: {insn.label}")
+                operand = labels[insn.label]
+            case CompareAndBranch():
+                if insn.label not in labels:
+                    raise ValueError(f"Undefined label: {insn.label}")
+                operand = labels[insn.label] << COMPARE_BITS | COMPARES.index(
+                    insn.compare
+                )
+            case PushImmediate() | AddImmediate():
+                operand = insn.value
+                if not INT_MIN <= operand <= INT_MAX:
+                    opcode |= POOLED
+                    operand = constant(operand)
+            case PushFP() | PushSP() | LoadLocal() | StoreLocal():
+                operand = insn.offset
+        comment: int = NO_COMMENT if insn.comment is None else constant(insn.comment)
+        code += RECORD.pack(opcode, operand, comment)
+    out: bytearray = bytearray(HEADER.pack(MAGIC, VERSION, len(insns), len(constants)))
+    out += code
+    for value in constants:
+        text: bytes = (value if isinstance(value, str) else str(value)).encode()
+        out += bytes((isinstance(value, str),)) + LENGTH.pack(len(text)) + text
+    return bytes(out)
+
+
+def is_bytecode(data) -> bool:
+    return data[: len(MAGIC)] == MAGIC
+
+
+# data is anything that supports the buffer protocol, a mapped file included
+def disassemble(data) -> List[Insn]:
+    with memoryview(data) as view:
+        magic, version, count, constantCount = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not Tau bytecode of a supported version")
+        end: int = HEADER.size + count * RECORD.size
+        records: list[tuple[int, int, int]] = list(
+            RECORD.iter_unpack(view[HEADER.size : end])
+        )
+        constants: list[Union[str, int]] = []
+        pos: int = end
+        for _ in range(constantCount):
+            isText: bool = bool(view[pos])
+            (length,) = LENGTH.unpack_from(view, pos + 1)
+            pos += 1 + LENGTH.size
+            text: str = str(view[pos : pos + length], "utf-8")
+            constants.append(text if isText else int(text))
+            pos += length
+    # equal records decode to one shared instruction object
+    decoded: dict[tuple[int, int, int], Insn] = {}
+    insns: List[Insn] = []
+    for record in records:
+        insn = decoded.get(record)
+        if insn is None:
+            insn = decoded[record] = decode(record, records, constants)
+        insns.append(insn)
+    return insns
+
+
+def decode(
+    record: tuple[int, int, int],
+    records: list[tuple[int, int, int]],
+    constants: list[Union[str, int]],
+) -> Insn:
+    opcode, operand, comment = record
+    cls: type = OPCODES[opcode & ~POOLED]
+    note = None if comment == NO_COMMENT else constants[comment]
+    if cls is Label:
+        return Label(constants[operand], note)
+    if cls is CompareAndBranch:
+        target: int = operand >> COMPARE_BITS
+        compare: str = COMPARES[operand & (1 << COMPARE_BITS) - 1]
+        return CompareAndBranch(compare, constants[records[target][1]], note)
+    if cls in BRANCHES:
+        return cls(constants[records[operand][1]], note)
+    if cls is PushImmediate or cls is AddImmediate:
+        return cls(constants[operand] if opcode & POOLED else operand, note)
+    if cls in (PushFP, PushSP, LoadLocal, StoreLocal):
+        return cls(operand, note)
+    return cls(note)
+
+
+def write(path: str, insns: List[Insn]):
+    with open(path, "wb") as f:
+        f.write(assemble(insns))
+
+
+def load(path: str) -> List[Insn]:
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return disassemble(mapped)
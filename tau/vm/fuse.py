@@ -0,0 +1,121 @@
+from typing import List, Optional
+
+from .vm_insns import *
+
+# Rewrites the sequences codegen emits most into superinstructions:
+#
+#   PushFP k; Load                     LoadLocal k
+#   PushFP k; <value>; Store           <value>; StoreLocal k
+#   PushImmediate v; Add               AddImmediate v
+#   PushImmediate v; Sub               AddImmediate -v
+#   PushImmediate -1; Mul              Negate
+#   <comparison>; JumpIfZero L         CompareAndBranch <comparison> L
+#
+# A StoreLocal is only formed when <value> is straight-line code that leaves
+# exactly one value above the address and neither reads the address nor
+# changes FP, so moving the PushFP down to the Store cannot change what is
+# stored where. Labels are kept, so the result links like any program. A
+# fused instruction keeps the first comment of the ones it replaces.
+
+# the stack slots each straight-line instruction pops and pushes
+EFFECTS: dict[type, tuple[int, int]] = {
+    PushImmediate: (0, 1),
+    PushFP: (0, 1),
+    PushSP: (0, 1),
+    Load: (1, 1),
+    Store: (2, 0),
+    Add: (2, 1),
+    Sub: (2, 1),
+    Mul: (2, 1),
+    Div: (2, 1),
+    Negate: (1, 1),
+    LessThan: (2, 1),
+    GreaterThan: (2, 1),
+    LessThanEqual: (2, 1),
+    GreaterThanEqual: (2, 1),
+    Equal: (2, 1),
+    NotEqual: (2, 1),
+    Not: (1, 1),
+    Swap: (2, 2),
+    Pop: (1, 0),
+    Noop: (0, 0),
+}
+
+COMPARES: dict[type, str] = {
+    LessThan: "lt",
+    GreaterThan: "gt",
+    LessThanEqual: "leq",
+    GreaterThanEqual: "geq",
+    Equal: "eq",
+    NotEqual: "neq",
+}
+
+
+def fuse(insns: List[Insn]) -> List[Insn]:
+    return pairs(locals_stored(insns))
+
+
+# the index of the Store that pops the address pushed at insns[start], if the
+# code between is straight-line
+def address_store(insns: List[Insn], start: int) -> Optional[int]:
+    depth: int = 0
+    for i in range(start + 1, len(insns)):
+        effect = EFFECTS.get(type(insns[i]))
+        if effect is None:
+            return None
+        pops, pushes = effect
+        if pops > depth:
+            is_store: bool = isinstance(insns[i], Store) and depth == 1
+            return i if is_store else None
+        depth += pushes - pops
+    return None
+
+
+def locals_stored(insns: List[Insn]) -> List[Insn]:
+    dropped: set[int] = set()
+    stores: dict[int, Insn] = {}
+    for i, insn in enumerate(insns):
+        if isinstance(insn, PushFP):
+            j: Optional[int] = address_store(insns, i)
+            if j is not None:
+                dropped.add(i)
+                stores[j] = StoreLocal(insn.offset, comment(insn, insns[j]))
+    return [
+        stores.get(i, insn) for i, insn in enumerate(insns) if i not in dropped
+    ]
+
+
+def pairs(insns: List[Insn]) -> List[Insn]:
+    out: List[Insn] = []
+    i: int = 0
+    while i < len(insns):
+        insn: Insn = insns[i]
+        nxt: Optional[Insn] = insns[i + 1] if i + 1 < len(insns) else None
+        fused: Optional[Insn] = None
+        match insn, nxt:
+            case PushFP(), Load():
+                fused = LoadLocal(insn.offset, comment(insn, nxt))
+            case PushImmediate(), Add():
+                fused = AddImmediate(insn.value, comment(insn, nxt))
+            case PushImmediate(), Sub():
+                fused = AddImmediate(-insn.value, comment(insn, nxt))
+            case PushImmediate(value=-1), Mul():
+                fused = Negate(comment(insn, nxt))
+            case _, JumpIfZero() if type(insn) in COMPARES:
+                fused = CompareAndBranch(
+                    COMPARES[type(insn)], nxt.label, comment(insn, nxt)
+                )
+        if fused is not None:
+            out.append(fused)
+            i += 2
+        else:
+            out.append(insn)
+            i += 1
+    return out
+
+
+def comment(*insns: Insn) -> Optional[str]:
+    for insn in insns:
+        if insn.comment is not None:
+            return insn.comment
+    return None
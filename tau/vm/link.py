@@ -0,0 +1,33 @@
+import copy
+from typing import List
+
+from .vm_insns import *
+from .bytecode import BRANCHES
+
+# Resolves a program's labels before it runs. The Label pseudo-instructions
+# are dropped, and every Jump, JumpIfZero, JumpIfNotZero and PushLabel is
+# replaced by a copy whose target is the PC of its label in the linked
+# program, so the VM never looks a label up or steps over one. The copies
+# keep their label name for dis and error messages; every other instruction
+# is shared with the input.
+
+
+def link(insns: List[Insn]) -> List[Insn]:
+    labels: dict[str, int] = {}
+    pc: int = 0
+    for insn in insns:
+        if isinstance(insn, Label):
+            assert insn.label not in labels, f"Duplicate label: {insn.label}"
+            labels[insn.label] = pc
+        else:
+            pc += 1
+    linked: List[Insn] = []
+    for insn in insns:
+        if isinstance(insn, Label):
+            continue
+        if isinstance(insn, BRANCHES):
+            assert insn.label in labels, f"Undefined label: {insn.label}"
+            insn = copy.copy(insn)
+            insn.target = labels[insn.label]
+        linked.append(insn)
+    return linked
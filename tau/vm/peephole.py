@@ -0,0 +1,144 @@
+import copy
+from typing import Callable, List, Optional
+
+from .vm_insns import *
+
+# Passes that shrink a program between codegen and the VM without changing
+# what it does. Each pass takes the instructions, labels and all, and returns
+# the new instructions and how many it removed or rewrote; optimize() runs the
+# enabled passes in order until none of them changes anything, so one pass
+# can expose work for another (a threaded jump can leave its label unused,
+# which can make a jump fall through to its target).
+#
+#   thread-jumps   a branch to a label whose code starts with Jump M goes to
+#                  M directly
+#   jump-to-next   Jump L right before label L is dropped, a conditional one
+#                  becomes Pop
+#   unreachable    code after Jump, JumpIndirect or Halt up to the next label
+#                  is dropped, such as the Halt after the last function and
+#                  the epilogue after a function's final return
+#   unused-labels  labels nothing refers to are dropped
+#
+# Only labels are jump targets and Call returns to the instruction after it,
+# so the code between an unconditional transfer and the next label can never
+# run.
+
+# instructions whose label operand is a jump target
+TARGETS: tuple[type, ...] = (
+    Jump,
+    JumpIfZero,
+    JumpIfNotZero,
+    PushLabel,
+    CompareAndBranch,
+)
+CONDITIONAL: tuple[type, ...] = (JumpIfZero, JumpIfNotZero)
+TRANSFERS: tuple[type, ...] = (Jump, JumpIndirect, Halt)
+
+
+def thread_jumps(insns: List[Insn]) -> tuple[List[Insn], int]:
+    # the Jump each label's code starts with, if it starts with one
+    jumps: dict[str, str] = {}
+    pending: list[str] = []
+    for insn in insns:
+        if isinstance(insn, Label):
+            pending.append(insn.label)
+            continue
+        if isinstance(insn, Jump):
+            for label in pending:
+                jumps[label] = insn.label
+        pending = []
+
+    def final(label: str) -> str:
+        seen: set[str] = {label}
+        while label in jumps and jumps[label] not in seen:
+            label = jumps[label]
+            seen.add(label)
+        return label
+
+    out: List[Insn] = []
+    changed: int = 0
+    for insn in insns:
+        if isinstance(insn, TARGETS):
+            target: str = final(insn.label)
+            if target != insn.label:
+                insn = copy.copy(insn)
+                insn.label = target
+                changed += 1
+        out.append(insn)
+    return out, changed
+
+
+def jump_to_next(insns: List[Insn]) -> tuple[List[Insn], int]:
+    out: List[Insn] = []
+    changed: int = 0
+    for i, insn in enumerate(insns):
+        if isinstance(insn, (Jump,) + CONDITIONAL):
+            # the labels right after the jump
+            following: set[str] = set()
+            j: int = i + 1
+            while j < len(insns) and isinstance(insns[j], Label):
+                following.add(insns[j].label)
+                j += 1
+            if insn.label in following:
+                changed += 1
+                if isinstance(insn, Jump):
+                    continue
+                # the condition must still be popped
+                insn = Pop(insn.comment)
+        out.append(insn)
+    return out, changed
+
+
+def unreachable(insns: List[Insn]) -> tuple[List[Insn], int]:
+    out: List[Insn] = []
+    reachable: bool = True
+    for insn in insns:
+        if isinstance(insn, Label):
+            reachable = True
+        if reachable:
+            out.append(insn)
+        if isinstance(insn, TRANSFERS):
+            reachable = False
+    return out, len(insns) - len(out)
+
+
+def unused_labels(insns: List[Insn]) -> tuple[List[Insn], int]:
+    used: set[str] = {insn.label for insn in insns if isinstance(insn, TARGETS)}
+    out: List[Insn] = [
+        insn for insn in insns if not isinstance(insn, Label) or insn.label in used
+    ]
+    return out, len(insns) - len(out)
+
+
+PASSES: dict[str, Callable[[List[Insn]], tuple[List[Insn], int]]] = {
+    "thread-jumps": thread_jumps,
+    "jump-to-next": jump_to_next,
+    "unreachable": unreachable,
+    "unused-labels": unused_labels,
+}
+
+
+# runs the named passes, all of them by default; stats, if given, gets the
+# number of instructions each pass removed or rewrote added to it
+def optimize(
+    insns: List[Insn],
+    passes: Optional[List[str]] = None,
+    stats: Optional[dict[str, int]] = None,
+) -> List[Insn]:
+    enabled: List[str] = list(PASSES) if passes is None else passes
+    changed: bool = True
+    while changed:
+        changed = False
+        for name in enabled:
+            insns, count = PASSES[name](insns)
+            if stats is not None:
+                stats[name] = stats.get(name, 0) + count
+            changed = changed or count > 0
+    return insns
+
+
+def report(stats: dict[str, int], before: int, after: int) -> str:
+    lines: List[str] = [f"peephole: {before} -> {after} instructions"]
+    for name, count in stats.items():
+        lines.append(f"  {name:14} {count:6}")
+    return "\n".join(lines)
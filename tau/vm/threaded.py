@@ -0,0 +1,317 @@
+from typing import Callable, List, Optional
+
+from . import vm
+from .vm_insns import *
+
+# A faster engine for the same programs. The linked program is translated into
+# a handler table: code[pc] is the function for the instruction's opcode and
+# operands[pc] its operand, already resolved. A handler does the instruction's
+# work and returns the PC to go to next, or None to halt, so the run loop does
+# nothing but call code[pc](pc). The handlers are built once per run and
+# shared by every instruction with the same opcode. Instructions are
+# translated the first time they run: every entry of code starts out as
+# translate, which fills in the entry and runs it, so code that never runs is
+# never translated and a large, mostly straight-line program pays about the
+# same to translate and run an instruction once as the step engine pays to
+# dispatch it. Loops and calls pay for the table once. FP and
+# SP live in variables the handlers share instead of the regs dict, and the
+# stack's append and pop are looked up once. The eval stack is changed in
+# place, never replaced, so the handlers can keep their references to it.
+# With verbose on it runs instruction by instruction through
+# vm.Execution.step so every state can be dumped.
+
+
+class Execution(vm.Execution):
+    def run(self):
+        if self.verbose:
+            super().run()
+            return
+        stack: List[int] = self.stack
+        memory: List[int] = self.memory
+        regs = self.regs
+        push = stack.append
+        pop = stack.pop
+        fp: int = regs["FP"]
+        sp: int = regs["SP"]
+
+        def noop(pc: int):
+            return pc + 1
+
+        def jump(pc: int):
+            return operands[pc]
+
+        def jumpIfZero(pc: int):
+            return operands[pc] if pop() == 0 else pc + 1
+
+        def jumpIfNotZero(pc: int):
+            return operands[pc] if pop() != 0 else pc + 1
+
+        def jumpIndirect(pc: int):
+            return pop()
+
+        def pushImmediate(pc: int):
+            push(operands[pc])
+            return pc + 1
+
+        def pushLabel(pc: int):
+            push(operands[pc])
+            return pc + 1
+
+        def load(pc: int):
+            push(memory[pop()])
+            return pc + 1
+
+        def store(pc: int):
+            if len(stack) <= 1:
+                raise Exception(f"Stack underflow: {registers(), stack}")
+            rval = pop()
+            lval = pop()
+            if lval > 10000:
+                raise Exception(f"Out of bounds memory access: {registers()}")
+            memory[lval] = rval
+            return pc + 1
+
+        def add(pc: int):
+            top = pop()
+            push(pop() + top)
+            return pc + 1
+
+        def sub(pc: int):
+            top = pop()
+            push(pop() - top)
+            return pc + 1
+
+        def mul(pc: int):
+            top = pop()
+            push(pop() * top)
+            return pc + 1
+
+        def div(pc: int):
+            top = pop()
+            push(pop() // top)
+            return pc + 1
+
+        def negate(pc: int):
+            push(-pop())
+            return pc + 1
+
+        def lessThan(pc: int):
+            top = pop()
+            push(1 if pop() < top else 0)
+            return pc + 1
+
+        def greaterThan(pc: int):
+            top = pop()
+            push(1 if pop() > top else 0)
+            return pc + 1
+
+        def lessThanEqual(pc: int):
+            top = pop()
+            push(1 if pop() <= top else 0)
+            return pc + 1
+
+        def greaterThanEqual(pc: int):
+            top = pop()
+            push(1 if pop() >= top else 0)
+            return pc + 1
+
+        def equal(pc: int):
+            top = pop()
+            push(1 if pop() == top else 0)
+            return pc + 1
+
+        def notEqual(pc: int):
+            top = pop()
+            push(1 if pop() != top else 0)
+            return pc + 1
+
+        def not_(pc: int):
+            push(1 if pop() == 0 else 0)
+            return pc + 1
+
+        def print_(pc: int):
+            print(pop())
+            return pc + 1
+
+        def pushFP(pc: int):
+            push(fp + operands[pc])
+            return pc + 1
+
+        def popFP(pc: int):
+            nonlocal fp
+            fp = pop()
+            return pc + 1
+
+        def pushSP(pc: int):
+            push(sp + operands[pc])
+            return pc + 1
+
+        def popSP(pc: int):
+            nonlocal sp
+            sp = pop()
+            return pc + 1
+
+        def pop_(pc: int):
+            pop()
+            return pc + 1
+
+        def swap(pc: int):
+            top = pop()
+            penultimate = pop()
+            push(top)
+            push(penultimate)
+            return pc + 1
+
+        def call(pc: int):
+            target = pop()
+            push(pc + 1)
+            return target
+
+        def saveEvalStack(pc: int):
+            nonlocal sp
+            size = len(stack)
+            memory[sp : sp + size + 1] = stack + [size]
+            sp += size + 1
+            stack.clear()
+            return pc + 1
+
+        def restoreEvalStack(pc: int):
+            nonlocal sp
+            size = memory[sp - 1]
+            stack[:0] = memory[sp - size - 1 : sp - 1]
+            sp -= size + 1
+            return pc + 1
+
+        def loadLocal(pc: int):
+            push(memory[fp + operands[pc]])
+            return pc + 1
+
+        def storeLocal(pc: int):
+            lval = fp + operands[pc]
+            if lval > 10000:
+                raise Exception(f"Out of bounds memory access: {registers()}")
+            memory[lval] = pop()
+            return pc + 1
+
+        def addImmediate(pc: int):
+            push(pop() + operands[pc])
+            return pc + 1
+
+        # CompareAndBranch has one handler per comparison
+        def compareLt(pc: int):
+            top = pop()
+            return pc + 1 if pop() < top else operands[pc]
+
+        def compareGt(pc: int):
+            top = pop()
+            return pc + 1 if pop() > top else operands[pc]
+
+        def compareLeq(pc: int):
+            top = pop()
+            return pc + 1 if pop() <= top else operands[pc]
+
+        def compareGeq(pc: int):
+            top = pop()
+            return pc + 1 if pop() >= top else operands[pc]
+
+        def compareEq(pc: int):
+            top = pop()
+            return pc + 1 if pop() == top else operands[pc]
+
+        def compareNeq(pc: int):
+            top = pop()
+            return pc + 1 if pop() != top else operands[pc]
+
+        def halt(pc: int):
+            regs["PC"] = pc
+            return None
+
+        def unknown(pc: int):
+            raise Exception(f"Unknown instruction: {self.insns[pc]}")
+
+        def registers() -> dict:
+            return {**regs, "FP": fp, "SP": sp}
+
+        handlers: dict[type, Callable[[int], Optional[int]]] = {
+            Noop: noop,
+            Jump: jump,
+            JumpIfZero: jumpIfZero,
+            JumpIfNotZero: jumpIfNotZero,
+            JumpIndirect: jumpIndirect,
+            PushImmediate: pushImmediate,
+            PushLabel: pushLabel,
+            Load: load,
+            Store: store,
+            Add: add,
+            Sub: sub,
+            Mul: mul,
+            Div: div,
+            Negate: negate,
+            LessThan: lessThan,
+            GreaterThan: greaterThan,
+            LessThanEqual: lessThanEqual,
+            GreaterThanEqual: greaterThanEqual,
+            Equal: equal,
+            NotEqual: notEqual,
+            Not: not_,
+            Print: print_,
+            PushFP: pushFP,
+            PopFP: popFP,
+            PushSP: pushSP,
+            PopSP: popSP,
+            Pop: pop_,
+            Swap: swap,
+            Call: call,
+            SaveEvalStack: saveEvalStack,
+            RestoreEvalStack: restoreEvalStack,
+            LoadLocal: loadLocal,
+            StoreLocal: storeLocal,
+            AddImmediate: addImmediate,
+            Halt: halt,
+        }
+        compares: dict[str, Callable[[int], Optional[int]]] = {
+            "lt": compareLt,
+            "gt": compareGt,
+            "leq": compareLeq,
+            "geq": compareGeq,
+            "eq": compareEq,
+            "neq": compareNeq,
+        }
+        insns: List[Insn] = self.insns
+
+        def translate(pc: int):
+            insn: Insn = insns[pc]
+            if isinstance(insn, CompareAndBranch):
+                handler = compares[insn.compare]
+            else:
+                handler = handlers.get(type(insn), unknown)
+            field: Optional[str] = OPERANDS.get(type(insn))
+            if field is not None:
+                operands[pc] = getattr(insn, field)
+            code[pc] = handler
+            return handler(pc)
+
+        code: List[Callable[[int], Optional[int]]] = [translate] * len(insns)
+        operands: List[Optional[int]] = [None] * len(insns)
+
+        pc: Optional[int] = regs["PC"]
+        while pc is not None:
+            pc = code[pc](pc)
+        regs["FP"], regs["SP"] = fp, sp
+
+
+# the field holding the operand a handler reads from operands[pc], for the
+# instructions that have one
+OPERANDS: dict[type, str] = {
+    Jump: "target",
+    JumpIfZero: "target",
+    JumpIfNotZero: "target",
+    PushLabel: "target",
+    CompareAndBranch: "target",
+    PushImmediate: "value",
+    AddImmediate: "value",
+    PushFP: "offset",
+    PushSP: "offset",
+    LoadLocal: "offset",
+    StoreLocal: "offset",
+}
@@ -1,6 +1,18 @@
-from typing import List, Dict, Tuple, Optional
+import operator
+from typing import Callable, List, Dict, Tuple, Optional
 
 from .vm_insns import *
+from .link import link
+
+# what each CompareAndBranch comparison computes
+COMPARES: Dict[str, Callable[[int, int], bool]] = {
+    "lt": operator.lt,
+    "gt": operator.gt,
+    "leq": operator.le,
+    "geq": operator.ge,
+    "eq": operator.eq,
+    "neq": operator.ne,
+}
 
 
 class Execution:
@@ -13,7 +25,8 @@ class Execution:
         regs: Dict[str, int],
     ):
         self.i = 0
-        self.insns: List[Insn] = insns
+        # labels are resolved to PCs here, so PCs index the linked program
+        self.insns: List[Insn] = link(insns)
         self.stack: List[int] = stack
         self.memory: List[int] = memory
         self.regs: Dict[str, int] = regs
@@ -23,20 +36,6 @@ class Execution:
             self.regs["SP"] = 0
         if "PC" not in self.regs:
             self.regs["PC"] = 0
-        self.labels: dict[str, int] = {}
-        for i, insn in enumerate(self.insns):
-            match insn:
-                case Label(label=label):
-                    assert (
-                        label not in self.labels
-                    ), f"Duplicate label: {label}"
-                    self.labels[label] = i
-
-        for insn in self.insns:
-            if hasattr(insn, "label"):
-                lab = getattr(insn, "label")
-                assert lab in self.labels, f"Undefined label: {lab}"
-
         self.verbose = False
 
     def __repr__(self):
@@ -63,20 +62,18 @@ class Execution:
     def step(self) -> Optional["Execution"]:
         insn = self.insns[self.regs["PC"]]
         match insn:
-            case Label():
-                self.regs["PC"] += 1
             case Noop():
                 self.regs["PC"] += 1
-            case Jump(label=label):
-                self.regs["PC"] = self.labels[label]
-            case JumpIfZero(label=label):
+            case Jump(target=target):
+                self.regs["PC"] = target
+            case JumpIfZero(target=target):
                 if self.stack.pop() == 0:
-                    self.regs["PC"] = self.labels[label]
+                    self.regs["PC"] = target
                 else:
                     self.regs["PC"] += 1
-            case JumpIfNotZero(label=label):
+            case JumpIfNotZero(target=target):
                 if self.stack.pop() != 0:
-                    self.regs["PC"] = self.labels[label]
+                    self.regs["PC"] = target
                 else:
                     self.regs["PC"] += 1
             case JumpIndirect():
@@ -84,8 +81,8 @@ class Execution:
             case PushImmediate(value=value):
                 self.stack.append(value)
                 self.regs["PC"] += 1
-            case PushLabel(label=label):
-                self.stack.append(self.labels[label])
+            case PushLabel(target=target):
+                self.stack.append(target)
                 self.regs["PC"] += 1
             case Load():
                 lval = self.stack.pop()
@@ -200,6 +197,25 @@ class Execution:
                 self.regs["SP"] -= size + 1
                 self.stack = tmp + self.stack
                 self.regs["PC"] += 1
+            case LoadLocal(offset=offset):
+                self.stack.append(self.memory[self.regs["FP"] + offset])
+                self.regs["PC"] += 1
+            case StoreLocal(offset=offset):
+                lval = self.regs["FP"] + offset
+                if lval > 10000:
+                    raise Exception(f"Out of bounds memory access: {self.regs}")
+                self.memory[lval] = self.stack.pop()
+                self.regs["PC"] += 1
+            case AddImmediate(value=value):
+                self.stack.append(self.stack.pop() + value)
+                self.regs["PC"] += 1
+            case CompareAndBranch(compare=compare, target=target):
+                top = self.stack.pop()
+                penultimate = self.stack.pop()
+                if COMPARES[compare](penultimate, top):
+                    self.regs["PC"] += 1
+                else:
+                    self.regs["PC"] = target
             case Halt():
                 return None
             case _:
@@ -207,13 +223,142 @@ class Execution:
         return self
 
     def run(self):
-        if self.verbose:
-            print("Begin Execution")
-            self.dump_state()
+        if not self.verbose:
+            self.run_fast()
+            return
+        print("Begin Execution")
+        self.dump_state()
         o = self
         while o is not None:
             o = self.step()
-            if self.verbose:
-                self.dump_state()
-        if self.verbose:
-            print("End Execution")
+            self.dump_state()
+        print("End Execution")
+
+    # step() inlined into one loop, with the registers in locals and the
+    # stack's methods bound once; the regs dict is only written back at Halt.
+    # The eval stack is changed in place instead of replaced. Cases are
+    # ordered by how often codegen and tau.vm.fuse output executes them.
+    def run_fast(self):
+        insns: List[Insn] = self.insns
+        stack: List[int] = self.stack
+        memory: List[int] = self.memory
+        push = stack.append
+        pop = stack.pop
+        pc: int = self.regs["PC"]
+        fp: int = self.regs["FP"]
+        sp: int = self.regs["SP"]
+        while True:
+            insn = insns[pc]
+            pc += 1
+            match insn:
+                case LoadLocal(offset=offset):
+                    push(memory[fp + offset])
+                case PushFP(offset=offset):
+                    push(fp + offset)
+                case StoreLocal(offset=offset):
+                    lval = fp + offset
+                    if lval > 10000:
+                        regs = dict(self.regs, PC=pc - 1, FP=fp, SP=sp)
+                        raise Exception(f"Out of bounds memory access: {regs}")
+                    memory[lval] = pop()
+                case CompareAndBranch(compare=compare, target=target):
+                    top = pop()
+                    if not COMPARES[compare](pop(), top):
+                        pc = target
+                case AddImmediate(value=value):
+                    push(pop() + value)
+                case Load():
+                    push(memory[pop()])
+                case PushImmediate(value=value):
+                    push(value)
+                case Store():
+                    if len(stack) <= 1:
+                        regs = dict(self.regs, PC=pc - 1, FP=fp, SP=sp)
+                        raise Exception(f"Stack underflow: {regs, stack}")
+                    rval = pop()
+                    lval = pop()
+                    if lval > 10000:
+                        regs = dict(self.regs, PC=pc - 1, FP=fp, SP=sp)
+                        raise Exception(f"Out of bounds memory access: {regs}")
+                    memory[lval] = rval
+                case JumpIfZero(target=target):
+                    if pop() == 0:
+                        pc = target
+                case Add():
+                    top = pop()
+                    push(pop() + top)
+                case Sub():
+                    top = pop()
+                    push(pop() - top)
+                case Mul():
+                    top = pop()
+                    push(pop() * top)
+                case GreaterThan():
+                    top = pop()
+                    push(int(pop() > top))
+                case LessThan():
+                    top = pop()
+                    push(int(pop() < top))
+                case Jump(target=target):
+                    pc = target
+                case Div():
+                    top = pop()
+                    push(pop() // top)
+                case PushSP(offset=offset):
+                    push(sp + offset)
+                case Equal():
+                    top = pop()
+                    push(int(pop() == top))
+                case PopFP():
+                    fp = pop()
+                case PopSP():
+                    sp = pop()
+                case LessThanEqual():
+                    top = pop()
+                    push(int(pop() <= top))
+                case GreaterThanEqual():
+                    top = pop()
+                    push(int(pop() >= top))
+                case NotEqual():
+                    top = pop()
+                    push(int(pop() != top))
+                case JumpIfNotZero(target=target):
+                    if pop() != 0:
+                        pc = target
+                case PushLabel(target=target):
+                    push(target)
+                case Call():
+                    target = pop()
+                    push(pc)
+                    pc = target
+                case Swap():
+                    top = pop()
+                    penultimate = pop()
+                    push(top)
+                    push(penultimate)
+                case JumpIndirect():
+                    pc = pop()
+                case Not():
+                    push(int(pop() == 0))
+                case Negate():
+                    push(-pop())
+                case Pop():
+                    pop()
+                case Print():
+                    print(pop())
+                case SaveEvalStack():
+                    size = len(stack)
+                    memory[sp : sp + size + 1] = stack + [size]
+                    sp += size + 1
+                    stack.clear()
+                case RestoreEvalStack():
+                    size = memory[sp - 1]
+                    stack[:0] = memory[sp - size - 1 : sp - 1]
+                    sp -= size + 1
+                case Noop():
+                    pass
+                case Halt():
+                    break
+                case _:
+                    raise Exception(f"Unknown instruction: {insn}")
+        self.regs["PC"], self.regs["FP"], self.regs["SP"] = pc - 1, fp, sp
@@ -644,6 +644,98 @@ class Noop(Insn):
         self.comment: Optional[str] = comment
 
 
+# Superinstructions: each does the work of a sequence codegen emits often, and
+# is only produced by tau.vm.fuse.
+
+
+class LoadLocal(Insn):
+    """
+    Verbose asm:  LoadLocal <offset:int>  [<comment:str>]
+    Concise asm:  ldl       <offset:int>  [<comment:str>]
+
+    Stack:
+                     |-------------------| <- TOS
+                     | memory[FP+offset] |
+    |-----| <- TOS   |-------------------|
+    | ... |          | ...               |
+    Before            After
+
+    Same as: PushFP <offset>; Load
+    """
+
+    def __init__(self, offset: int, comment: Optional[str] = None):
+        self.offset: int = offset
+        self.comment: Optional[str] = comment
+
+
+class StoreLocal(Insn):
+    """
+    Verbose asm:  StoreLocal <offset:int>  [<comment:str>]
+    Concise asm:  stl        <offset:int>  [<comment:str>]
+
+    Stack:
+    |-----| <- TOS
+    | v   |
+    |-----|          |-----| <- TOS
+    | ... |          | ... |
+    Before            After
+
+    Side Effects: memory[FP+offset] <- v
+
+    Same as: PushFP <offset> before v is computed, then Store
+    """
+
+    def __init__(self, offset: int, comment: Optional[str] = None):
+        self.offset: int = offset
+        self.comment: Optional[str] = comment
+
+
+class AddImmediate(Insn):
+    """
+    Verbose asm:  AddImmediate <value:int>  [<comment:str>]
+    Concise asm:  addi         <value:int>  [<comment:str>]
+
+    Stack:
+    |-----| <- TOS   |-----------| <- TOS
+    | x   |          | x + value |
+    |-----|          |-----------|
+    | ... |          | ...       |
+    Before            After
+
+    Same as: PushImmediate <value>; Add
+    """
+
+    def __init__(self, value: int, comment: Optional[str] = None):
+        self.value: int = value
+        self.comment: Optional[str] = comment
+
+
+class CompareAndBranch(Insn):
+    """
+    Verbose asm:  CompareAndBranch <compare:str> <label:str>  [<comment:str>]
+    Concise asm:  cbr              <compare:str> <label:str>  [<comment:str>]
+
+    Stack:
+    |-----| <- TOS
+    | y   |
+    |-----|
+    | x   |
+    |-----|          |-----| <- TOS
+    | ... |          | ... |
+    Before            After
+
+    Side Effects: PC <- label iff not (x compare y)
+
+    compare is the concise asm of a comparison: lt, gt, leq, geq, eq or neq.
+    Same as: <compare>; JumpIfZero <label>
+    """
+
+    def __init__(self, compare: str, label: str, comment: Optional[str] = None):
+        self.compare: str = compare
+        self.label: str = label
+        self.comment: Optional[str] = comment
+
+
 def dis(insn: Insn, long=True, indent=0):
     args = ""
     indentation = " " * indent
@@ -724,6 +816,18 @@ def dis(insn: Insn, long=True, indent=0):
             op = "RestoreEvalStack" if long else "restore"
         case Noop():
             op = "Noop" if long else "noop"
+        case LoadLocal():
+            op = "LoadLocal" if long else "ldl"
+            args += insn.offset.__repr__()
+        case StoreLocal():
+            op = "StoreLocal" if long else "stl"
+            args += insn.offset.__repr__()
+        case AddImmediate():
+            op = "AddImmediate" if long else "addi"
+            args += insn.value.__repr__()
+        case CompareAndBranch():
+            op = "CompareAndBranch" if long else "cbr"
+            args += insn.compare.__repr__() + " " + insn.label.__repr__()
     args += insn.comment.__repr__() if insn.comment else ""
     return f"{indentation}{op} {args}"
 
@@ -795,4 +899,12 @@ reserved = [
     "restore",
     "Noop",
     "noop",
+    "LoadLocal",
+    "ldl",
+    "StoreLocal",
+    "stl",
+    "AddImmediate",
+    "addi",
+    "CompareAndBranch",
+    "cbr",
 ]
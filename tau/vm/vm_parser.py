@@ -96,12 +96,20 @@ class Parser:
             "st",
             "sub",
             "swap",
+            "LoadLocal",
+            "StoreLocal",
+            "AddImmediate",
+            "CompareAndBranch",
+            "ldl",
+            "stl",
+            "addi",
+            "cbr",
         }:
             _tmp__start__4432493968 = self._operation()
             _start_.append(_tmp__start__4432493968)
         return _start_
 
-    # operation -> ("Label" | "lab") str [ str ] | ("Jump" | "j") str [ str ] | ("JumpIfZero" | "jz") str [ str ] | ("JumpIfNotZero" | "jnz") str [ str ] | ("JumpIndirect" | "ji") [ str ] | ("PushImmediate" | "push") int [ str ] | ("PushLabel" | "pushl") str [ str ] | ("Add" | "add") [ str ] | ("Sub" | "sub") [ str ] | ("Mul" | "mul") [ str ] | ("Div" | "div") [ str ] | ("Negate" | "neg") [ str ] | ("LessThan" | "lt") [ str ] | ("GreaterThan" | "gt") [ str ] | ("LessThanEqual" | "leq") [ str ] | ("GreaterThanEqual" | "geq") [ str ] | ("Equal" | "eq") [ str ] | ("NotEqual" | "neq") [ str ] | ("Not" | "not") [ str ] | ("Load" | "ld") [ str ] | ("Store" | "st") [ str ] | ("Print" | "print") [ str ] | ("PushFP" | "pushFP") int [ str ] | ("PopFP" | "popFP") [ str ] | ("PushSP" | "pushSP") int [ str ] | ("PopSP" | "popSP") [ str ] | ("Call" | "call") [ str ] | ("Halt" | "halt") [ str ] | ("Pop" | "pop") [ str ] | ("Swap" | "swap") [ str ] | ("SaveEvalStack" | "save") [ str ] | ("RestoreEvalStack" | "restore") [ str ] | ("Noop" | "noop") [ str ]
+    # operation -> ("Label" | "lab") str [ str ] | ("Jump" | "j") str [ str ] | ("JumpIfZero" | "jz") str [ str ] | ("JumpIfNotZero" | "jnz") str [ str ] | ("JumpIndirect" | "ji") [ str ] | ("PushImmediate" | "push") int [ str ] | ("PushLabel" | "pushl") str [ str ] | ("Add" | "add") [ str ] | ("Sub" | "sub") [ str ] | ("Mul" | "mul") [ str ] | ("Div" | "div") [ str ] | ("Negate" | "neg") [ str ] | ("LessThan" | "lt") [ str ] | ("GreaterThan" | "gt") [ str ] | ("LessThanEqual" | "leq") [ str ] | ("GreaterThanEqual" | "geq") [ str ] | ("Equal" | "eq") [ str ] | ("NotEqual" | "neq") [ str ] | ("Not" | "not") [ str ] | ("Load" | "ld") [ str ] | ("Store" | "st") [ str ] | ("Print" | "print") [ str ] | ("PushFP" | "pushFP") int [ str ] | ("PopFP" | "popFP") [ str ] | ("PushSP" | "pushSP") int [ str ] | ("PopSP" | "popSP") [ str ] | ("Call" | "call") [ str ] | ("Halt" | "halt") [ str ] | ("Pop" | "pop") [ str ] | ("Swap" | "swap") [ str ] | ("SaveEvalStack" | "save") [ str ] | ("RestoreEvalStack" | "restore") [ str ] | ("Noop" | "noop") [ str ] | ("LoadLocal" | "ldl") int [ str ] | ("StoreLocal" | "stl") int [ str ] | ("AddImmediate" | "addi") int [ str ] | ("CompareAndBranch" | "cbr") str str [ str ]
     def _operation(self) -> Insn:
         if self.current() in {"Label", "lab"}:
             if self.current() in {"Label"}:
@@ -507,6 +515,59 @@ class Parser:
             if self.current() in {"STR"}:
                 comment = self._str()
             _operation_ = Noop(comment)
+        elif self.current() in {"LoadLocal", "ldl"}:
+            if self.current() in {"LoadLocal"}:
+                self.match("LoadLocal")
+            elif self.current() in {"ldl"}:
+                self.match("ldl")
+            else:
+                self.error("syntax error")
+                assert False
+            offset = self._int()
+            comment = None
+            if self.current() in {"STR"}:
+                comment = self._str()
+            _operation_ = LoadLocal(offset, comment)
+        elif self.current() in {"StoreLocal", "stl"}:
+            if self.current() in {"StoreLocal"}:
+                self.match("StoreLocal")
+            elif self.current() in {"stl"}:
+                self.match("stl")
+            else:
+                self.error("syntax error")
+                assert False
+            offset = self._int()
+            comment = None
+            if self.current() in {"STR"}:
+                comment = self._str()
+            _operation_ = StoreLocal(offset, comment)
+        elif self.current() in {"AddImmediate", "addi"}:
+            if self.current() in {"AddImmediate"}:
+                self.match("AddImmediate")
+            elif self.current() in {"addi"}:
+                self.match("addi")
+            else:
+                self.error("syntax error")
+                assert False
+            value = self._int()
+            comment = None
+            if self.current() in {"STR"}:
+                comment = self._str()
+            _operation_ = AddImmediate(value, comment)
+        elif self.current() in {"CompareAndBranch", "cbr"}:
+            if self.current() in {"CompareAndBranch"}:
+                self.match("CompareAndBranch")
+            elif self.current() in {"cbr"}:
+                self.match("cbr")
+            else:
+                self.error("syntax error")
+                assert False
+            compare = self._str()
+            label = self._str()
+            comment = None
+            if self.current() in {"STR"}:
+                comment = self._str()
+            _operation_ = CompareAndBranch(compare, label, comment)
         else:
             self.error("syntax error")
             assert False
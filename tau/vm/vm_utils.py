@@ -1,12 +1,15 @@
 from typing import List
 
-from . import vm, vm_insns
+from . import vm, vm_insns, threaded
 
+# the execution engines, all running the same programs with the same output
+engines: dict[str, type[vm.Execution]] = {
+    "step": vm.Execution,
+    "threaded": threaded.Execution,
+}
 
-def invoke_vm(insns, params, verbose):
-    if verbose:
-        dump_insns(insns)
 
+def invoke_vm(insns, params, verbose, engine="step"):
     args = []
     for arg in reversed(params):
         if arg.isnumeric():
@@ -21,8 +24,10 @@ def invoke_vm(insns, params, verbose):
         "FP": 0,
         "SP": len(args) + 1,
     }
-    exe = vm.Execution(insns, stack, memory, regs)
+    exe = engines[engine](insns, stack, memory, regs)
     exe.verbose = verbose
+    if verbose:
+        dump_insns(exe.insns)
     exe.run()
     if (exe.regs["SP"] != len(args) + 1):
         raise Exception(f"Stack pointer not restored: {exe.regs}")
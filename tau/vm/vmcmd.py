@@ -2,11 +2,12 @@ import pprint
 import argparse
 from typing import List, Dict, Tuple, Set, Optional, Union
 
+from . import bytecode
 from .vm_parser import Parser
 from .vm_scanner import Scanner
 
 # from vm_insns
-from .vm_utils import dump_insns
+from .vm_utils import dump_insns, engines
 from .vm import *
 
 
@@ -17,29 +18,49 @@ def get_args():
     )
     ap.add_argument("--file", type=str, required=True, help="The file to run")
     ap.add_argument("--verbose", action="store_true", help="verbose output")
+    ap.add_argument(
+        "--engine",
+        choices=list(engines),
+        default="step",
+        help="execution engine",
+    )
+    ap.add_argument(
+        "--save",
+        type=str,
+        default=None,
+        help="write the program to this file as bytecode instead of running it",
+    )
     return ap.parse_args()
 
 
 def main():
     args = get_args()
     fname = args.file
-    with open(fname) as f:
-        input = f.read()
-    lexer = Scanner(input, reserved=reserved)
-    psr = Parser(lexer)
-    insns: List[Insn] = psr.parse()
+    with open(fname, "rb") as f:
+        binary: bool = bytecode.is_bytecode(f.read(len(bytecode.MAGIC)))
+    if binary:
+        insns: List[Insn] = bytecode.load(fname)
+    else:
+        with open(fname) as f:
+            input = f.read()
+        lexer = Scanner(input, reserved=reserved)
+        psr = Parser(lexer)
+        insns = psr.parse()
 
-    if args.verbose:
-        dump_insns(insns)
+    if args.save is not None:
+        bytecode.write(args.save, insns)
+        return
 
     params = list(reversed(args.args)) + [0]  # w/ space for return value
-    exe = Execution(
+    exe = engines[args.engine](
         insns,
         [],
         params + [0] * 100000,
         {"SP": len(params)},
     )
     exe.verbose = args.verbose
+    if args.verbose:
+        dump_insns(exe.insns)
     exe.run()
 
 
@@ -29,48 +29,48 @@ def callexpr(ast: asts.CallExpr, retType: symbols.SemanticType):
 def arraycell(ast: asts.ArrayCell, retType: symbols.SemanticType):
     expr(ast.arr, retType)
     expr(ast.idx, retType)
-    if ast.idx.semantic_type != symbols.IntType():
+    if ast.idx.semantic_type is not symbols.INT:
         error.error("Array index must be int", ast.idx.span)
-    ast.semantic_type = symbols.IntType()
+    ast.semantic_type = symbols.INT
 
 
 def intliteral(ast: asts.IntLiteral, retType: symbols.SemanticType):
-    ast.semantic_type = symbols.IntType()
+    ast.semantic_type = symbols.INT
 
 
 def boolliteral(ast: asts.BoolLiteral, retType: symbols.SemanticType):
-    ast.semantic_type = symbols.BoolType()
+    ast.semantic_type = symbols.BOOL
 
 
 def binaryop(ast: asts.BinaryOp, retType: symbols.SemanticType):
     expr(ast.left, retType)
     expr(ast.right, retType)
     if ast.op.value in {"+", "-", "*", "/"}:
-        if ast.left.semantic_type != symbols.IntType():
+        if ast.left.semantic_type is not symbols.INT:
             error.error("Binary operation is valid for int only", ast.left.span)
-        elif ast.right.semantic_type != symbols.IntType():
+        elif ast.right.semantic_type is not symbols.INT:
             error.error("Binary operation is valid for int only", ast.right.span)
-        ast.semantic_type = symbols.IntType()
+        ast.semantic_type = symbols.INT
     elif ast.op.value in {"<", ">", "<=", ">=", "==", "!=", "and", "or"}:
         if ast.op.value in {"<", ">", "<=", ">=", "==", "!="}:
-            if ast.left.semantic_type != ast.right.semantic_type:
+            if ast.left.semantic_type is not ast.right.semantic_type:
                 error.error("Binary operation is valid for same types only", ast.span)
         if ast.op.value in {"and", "or"}:
-            if ast.left.semantic_type != symbols.BoolType():
+            if ast.left.semantic_type is not symbols.BOOL:
                 error.error("Binary operation is valid for bool only", ast.left.span)
-            elif ast.right.semantic_type != symbols.BoolType():
+            elif ast.right.semantic_type is not symbols.BOOL:
                 error.error("Binary operation is valid for bool only", ast.right.span)
-        if ast.left.semantic_type != ast.right.semantic_type:
+        if ast.left.semantic_type is not ast.right.semantic_type:
             error.error("Binary operation is valid for same types only", ast.span)
-        ast.semantic_type = symbols.BoolType()
+        ast.semantic_type = symbols.BOOL
 
 
 def unaryop(ast: asts.UnaryOp, retType: symbols.SemanticType):
     expr(ast.expr, retType)
     if ast.op.value in {"-"}:
-        ast.semantic_type = symbols.IntType()
+        ast.semantic_type = symbols.INT
     elif ast.op.value in {"not"}:
-        ast.semantic_type = symbols.BoolType()
+        ast.semantic_type = symbols.BOOL
 
 
 def expr(ast: asts.Expr, retType: symbols.SemanticType):
@@ -90,31 +90,31 @@ def expr(ast: asts.Expr, retType: symbols.SemanticType):
         case asts.UnaryOp():
             unaryop(ast, retType)
         case _:
-            errorMsg = f"expr() not implemented for {type(ast)}"
+            errorMsg = f"expr() not implemented for {ast.__class__}"
             error.error(errorMsg, ast.span)
 
 
 def inttype(ast: asts.IntType, retType: symbols.SemanticType):
-    ast.semantic_type = symbols.IntType()
+    ast.semantic_type = symbols.INT
 
 
 def booltype(ast: asts.BoolType, retType: symbols.SemanticType):
-    ast.semantic_type = symbols.BoolType()
+    ast.semantic_type = symbols.BOOL
 
 
 def arraytype(ast: asts.ArrayType, retType: symbols.SemanticType):
     if ast.size is not None:
         expr(ast.size, retType)
     # check if size is int
-    if ast.size != None and ast.size.semantic_type != symbols.IntType():
+    if ast.size != None and ast.size.semantic_type is not symbols.INT:
         error.error("Array size must be int", ast.size.span)
     if typ(ast.element_type_ast, retType) == -1:
         error.error("Array element type must be int or bool", ast.span)
-    ast.semantic_type = symbols.ArrayType(ast.element_type_ast.semantic_type)
+    ast.semantic_type = symbols.array_type(ast.element_type_ast.semantic_type)
 
 
 def voidtype(ast: asts.VoidType, retType: symbols.SemanticType):
-    ast.semantic_type = symbols.VoidType()
+    ast.semantic_type = symbols.VOID
 
 
 def typ(ast: asts.TypeAST, retType: symbols.SemanticType) -> int:
@@ -161,13 +161,13 @@ def compoundstmt(ast: asts.CompoundStmt, retType: symbols.SemanticType):
 def assignstmt(ast: asts.AssignStmt, retType: symbols.SemanticType):
     expr(ast.lhs, retType)
     expr(ast.rhs, retType)
-    if ast.lhs.semantic_type != ast.rhs.semantic_type:
+    if ast.lhs.semantic_type is not ast.rhs.semantic_type:
         error.error("Assign type mismatch", ast.lhs.span)
 
 
 def ifstmt(ast: asts.IfStmt, retType: symbols.SemanticType):
     expr(ast.expr, retType)
-    if ast.expr.semantic_type != symbols.BoolType():
+    if ast.expr.semantic_type is not symbols.BOOL:
         error.error("If condition must be bool", ast.expr.span)
     stmt(ast.thenStmt, retType)
     if ast.elseStmt is not None:
@@ -176,7 +176,7 @@ def ifstmt(ast: asts.IfStmt, retType: symbols.SemanticType):
 
 def whilestmt(ast: asts.WhileStmt, retType: symbols.SemanticType):
     expr(ast.expr, retType)
-    if ast.expr.semantic_type != symbols.BoolType():
+    if ast.expr.semantic_type is not symbols.BOOL:
         error.error("While condition must be bool", ast.expr.span)
     stmt(ast.stmt, retType)
 
@@ -184,7 +184,7 @@ def whilestmt(ast: asts.WhileStmt, retType: symbols.SemanticType):
 def returnstmt(ast: asts.ReturnStmt, retType: symbols.SemanticType):
     if ast.expr is not None:
         expr(ast.expr, retType)
-        if ast.expr.semantic_type != retType:
+        if ast.expr.semantic_type is not retType:
             error.error("Return type mismatch", ast.expr.span)
 
 
@@ -213,7 +213,7 @@ def stmt(ast: asts.Stmt, retType: symbols.SemanticType):
         case asts.PrintStmt():
             printstmt(ast, retType)
         case _:
-            errorMsg: str = f"stmt() not implemented for {type(ast)}"
+            errorMsg: str = f"stmt() not implemented for {ast.__class__}"
             error.error(errorMsg, ast.span)
 
 
@@ -225,7 +225,7 @@ def funcdecl(ast: asts.FuncDecl, retType: symbols.SemanticType):
         params.append(param.type_ast.semantic_type)
     if typ(ast.ret_type_ast, retType) == -1:
         error.error("Return type must be int or bool", ast.span)
-    ast.id.semantic_type = symbols.FuncType(params, ast.ret_type_ast.semantic_type)
+    ast.id.semantic_type = symbols.func_type(params, ast.ret_type_ast.semantic_type)
     ast.id.symbol.set_type(ast.id.semantic_type)
     compoundstmt(ast.body, ast.ret_type_ast.semantic_type)
 